@@ -0,0 +1,30 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+C walk over point-dict strokes for SignatureDataCollector._to_soa
+Build in place with: python setup.py build_ext --inplace
+"""
+
+cdef double NAN = float('nan')
+
+
+def soa(list strokes, double[::1] xs, double[::1] ys, double[::1] ts, Py_ssize_t[::1] stroke_starts):
+    """
+    Copy every stroke's 'points' into the preallocated xs/ys/ts buffers and
+    record where each stroke starts; points without a 'time' get NaN
+    """
+    cdef Py_ssize_t i = 0
+    cdef Py_ssize_t k = 0
+    cdef dict stroke
+    cdef dict point
+    cdef object time
+    
+    for stroke in strokes:
+        stroke_starts[k] = i
+        k += 1
+        for point in stroke.get('points', ()):
+            xs[i] = point['x']
+            ys[i] = point['y']
+            time = point.get('time')
+            ts[i] = NAN if time is None else time
+            i += 1
+    stroke_starts[k] = i
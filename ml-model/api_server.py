@@ -1,61 +1,320 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
-import json
+from flask_compress import Compress
+import fcntl
+import numpy as np
+import orjson
+import os
+import ijson
+import io
+import queue
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from pathlib import Path
 from datetime import datetime
 from collect_signature_data import SignatureDataCollector
+from orjson_response import ORJSONResponse, json_response
 
 # Create Flask app
 app = Flask(__name__)
+app.response_class = ORJSONResponse
 CORS(app)  # Allow requests from your frontend
 
+# Compress larger responses (dashboard stats, feature importance); tiny
+# bodies like /api/health aren't worth the CPU
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 512
+Compress(app)
+
 # Create our signature collector
 collector = SignatureDataCollector()
 
+DirEntry = namedtuple('DirEntry', ['path', 'ctime', 'name'])
+
+class _DirCache:
+    """
+    Short-lived cache of directory listings shared by the dashboard endpoints
+    Each (directory, prefix, suffix) listing is rescanned at most once per ttl
+    seconds, so polling the dashboard doesn't stat every signature file on
+    every request
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scans = {}
+    
+    def scan(self, directory, prefix, suffix, ttl=5.0):
+        """Return a list of DirEntry(path, ctime, name) for matching files"""
+        return self._get(directory, prefix, suffix, ttl)[0]
+    
+    def latest(self, directory, prefix, suffix, ttl=5.0):
+        """Return the most recently created matching DirEntry, or None"""
+        return self._get(directory, prefix, suffix, ttl)[1]
+    
+    def _get(self, directory, prefix, suffix, ttl):
+        key = (directory, prefix, suffix)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._scans.get(key)
+            if cached and now - cached[0] < ttl:
+                return cached[1]
+        
+        # scandir hands back names directly, no basename/fnmatch per file
+        entries = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    name = entry.name
+                    if not (name.startswith(prefix) and name.endswith(suffix)):
+                        continue
+                    try:
+                        entries.append(DirEntry(entry.path, entry.stat().st_ctime, name))
+                    except OSError:
+                        # File removed between listing and stat
+                        continue
+        except FileNotFoundError:
+            pass
+        latest = max(entries, key=lambda e: e.ctime, default=None)
+        
+        with self._lock:
+            self._scans[key] = (now, (entries, latest))
+        return entries, latest
+
+_dir_cache = _DirCache()
+
+DATA_PREFIX = 'signature_data_'
+DATA_SUFFIX = '.json'
+
+# Running totals for the dashboard, persisted so every worker process sees the
+# same counts. Writers hold an flock on AGGREGATE_LOCK_PATH for the whole
+# read-modify-write so concurrent saves from different processes don't drop counts
+AGGREGATE_PATH = 'data/_aggregate.json'
+AGGREGATE_LOCK_PATH = AGGREGATE_PATH + '.lock'
+_aggregate_lock = threading.Lock()
+
+def _tally(aggregate, name):
+    """Count one saved signature, keyed the same way as its filename"""
+    user_id, _, _ = name.partition('_')
+    per_user_counts = aggregate['per_user_counts']
+    per_user_counts[user_id] = per_user_counts.get(user_id, 0) + 1
+    
+    # Count genuine vs forgery
+    if 'forger' in name.lower():
+        aggregate['forgery'] += 1
+    else:
+        aggregate['genuine'] += 1
+
+@contextmanager
+def _locked_aggregate():
+    """Hold the in-process lock and the cross-process file lock together"""
+    os.makedirs('data', exist_ok=True)
+    with _aggregate_lock, open(AGGREGATE_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_aggregate_file():
+    """The persisted totals and the file's mtime, or (None, None) if it's missing"""
+    try:
+        with open(AGGREGATE_PATH, 'rb') as f:
+            return orjson.loads(f.read()), os.fstat(f.fileno()).st_mtime_ns
+    except FileNotFoundError:
+        return None, None
+
+def _write_aggregate(aggregate):
+    """Atomically replace the aggregate file; call with _locked_aggregate held"""
+    # Per-process temp name so two workers never write the same temp file
+    tmp_path = f'{AGGREGATE_PATH}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(aggregate))
+    os.replace(tmp_path, AGGREGATE_PATH)
+    return os.stat(AGGREGATE_PATH).st_mtime_ns
+
+def _rebuild_aggregate():
+    """Recount every saved signature file and persist the totals"""
+    aggregate = {'genuine': 0, 'forgery': 0, 'per_user_counts': {}}
+    with _locked_aggregate():
+        for entry in _dir_cache.scan('data', DATA_PREFIX, DATA_SUFFIX, ttl=0):
+            # signature_data_<user>_<timestamp>.json -> <user>_<timestamp>
+            _tally(aggregate, entry.name[len(DATA_PREFIX):-len(DATA_SUFFIX)])
+        mtime = _write_aggregate(aggregate)
+    return aggregate, mtime
+
+def _record_signature(user_id):
+    """Add a newly saved signature to the persisted aggregate"""
+    global _aggregate, _aggregate_mtime
+    with _locked_aggregate():
+        # Start from the file, not our copy: other workers may have added to it
+        aggregate, _ = _read_aggregate_file()
+        if aggregate is None:
+            aggregate = _aggregate
+        _tally(aggregate, str(user_id))
+        _aggregate_mtime = _write_aggregate(aggregate)
+        _aggregate = aggregate
+
+def _current_aggregate():
+    """The latest totals, re-reading the file only when another worker changed it"""
+    global _aggregate, _aggregate_mtime
+    try:
+        mtime = os.stat(AGGREGATE_PATH).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if mtime is not None and mtime == _aggregate_mtime:
+        return _aggregate
+    
+    with _locked_aggregate():
+        aggregate, mtime = _read_aggregate_file()
+        if aggregate is None:
+            # File was removed underneath us; restore it from memory
+            mtime = _write_aggregate(_aggregate)
+            aggregate = _aggregate
+        _aggregate, _aggregate_mtime = aggregate, mtime
+    return aggregate
+
+# Rebuild once on startup so the totals match what's on disk
+_aggregate, _aggregate_mtime = _rebuild_aggregate()
+
+# Per-user consistency results, reused for a short while by polling dashboards
+CONSISTENCY_TTL = 30.0
+_consistency_cache = {}
+_consistency_lock = threading.Lock()
+
+def _get_consistency(user_id):
+    """collector.analyze_consistency, cached per user for CONSISTENCY_TTL seconds"""
+    now = time.monotonic()
+    with _consistency_lock:
+        cached = _consistency_cache.get(user_id)
+        if cached and now - cached[0] < CONSISTENCY_TTL:
+            return cached[1]
+    
+    analysis = collector.analyze_consistency(user_id)
+    with _consistency_lock:
+        _consistency_cache[user_id] = (now, analysis)
+    return analysis
+
+def _invalidate_consistency(user_id):
+    """Drop a user's cached consistency after they submit a new signature"""
+    with _consistency_lock:
+        _consistency_cache.pop(user_id, None)
+
+# Bodies larger than this are stream-parsed instead of loaded in one go
+STREAM_THRESHOLD = 64 * 1024
+POINT_CHUNK = 1024
+
+def _stream_signature_payload(stream):
+    """
+    Incrementally parse a collect-signature body with ijson
+    Points are written straight into preallocated per-stroke NumPy columns,
+    so large signatures never exist as a tree of Python dicts
+    Returns (user_id, signature_type, strokes)
+    """
+    user_id = 'unknown'
+    signature_type = 'genuine'
+    strokes = []
+    stroke = None
+    n = 0
+    
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if prefix == 'userId':
+            user_id = value
+        elif prefix == 'type':
+            signature_type = value
+        elif prefix == 'signaturePadData.item':
+            if event == 'start_map':
+                stroke = {
+                    'xs': np.empty(POINT_CHUNK, dtype=np.float32),
+                    'ys': np.empty(POINT_CHUNK, dtype=np.float32),
+                    # Timestamps stay float64: epoch milliseconds lose precision in float32
+                    'ts': np.empty(POINT_CHUNK, dtype=np.float64),
+                    'startTime': 0,
+                    'endTime': 0
+                }
+                n = 0
+            elif event == 'end_map':
+                for key in ('xs', 'ys', 'ts'):
+                    stroke[key] = stroke[key][:n]
+                strokes.append(stroke)
+        elif prefix in ('signaturePadData.item.startTime', 'signaturePadData.item.endTime'):
+            stroke[prefix.rsplit('.', 1)[1]] = value
+        elif prefix == 'signaturePadData.item.points.item' and event == 'start_map':
+            if n == len(stroke['xs']):
+                for key in ('xs', 'ys', 'ts'):
+                    stroke[key] = np.resize(stroke[key], n + POINT_CHUNK)
+            # Same defaults as the non-streaming path; time is estimated if not provided
+            stroke['xs'][n] = 0
+            stroke['ys'][n] = 0
+            stroke['ts'][n] = n * 10
+            n += 1
+        elif prefix == 'signaturePadData.item.points.item.x':
+            stroke['xs'][n - 1] = value
+        elif prefix == 'signaturePadData.item.points.item.y':
+            stroke['ys'][n - 1] = value
+        elif prefix == 'signaturePadData.item.points.item.time':
+            stroke['ts'][n - 1] = value
+    
+    return user_id, signature_type, strokes
+
 @app.route('/api/collect-signature', methods=['POST'])
 def collect_signature():
     """
     Endpoint to receive signature data from the frontend
     """
     try:
-        data = request.json
-        user_id = data.get('userId', 'unknown')
-        signature_type = data.get('type', 'genuine')
-        
-        # Transform frontend data to match our expected format
-        signature_data = {
-            'strokes': []
-        }
-        
-        # Convert the signature pad data
-        if 'signaturePadData' in data:
-            for stroke in data['signaturePadData']:
-                stroke_data = {
-                    'points': [],
-                    'startTime': stroke.get('startTime', 0),
-                    'endTime': stroke.get('endTime', 0)
-                }
-                
-                # Add points with timestamps
-                for i, point in enumerate(stroke.get('points', [])):
-                    stroke_data['points'].append({
-                        'x': point.get('x', 0),
-                        'y': point.get('y', 0),
-                        'time': point.get('time', i * 10)  # Estimate time if not provided
+        if (request.content_length or 0) > STREAM_THRESHOLD:
+            # Large signatures: parse incrementally straight into point columns
+            # Buffered so ijson's read(0) probe isn't taken as a client disconnect
+            body = io.BufferedReader(request.stream, buffer_size=STREAM_THRESHOLD)
+            user_id, signature_type, strokes = _stream_signature_payload(body)
+            signature_data = {
+                'strokes': strokes
+            }
+        else:
+            data = orjson.loads(request.get_data(cache=False))
+            user_id = data.get('userId', 'unknown')
+            signature_type = data.get('type', 'genuine')
+            
+            # Transform frontend data to match our expected format
+            signature_data = {
+                'strokes': []
+            }
+            
+            # Convert the signature pad data into per-stroke x/y/time columns
+            if 'signaturePadData' in data:
+                for stroke in data['signaturePadData']:
+                    points = stroke.get('points', [])
+                    n = len(points)
+                    
+                    signature_data['strokes'].append({
+                        'xs': np.fromiter((p.get('x', 0) for p in points), dtype=np.float32, count=n),
+                        'ys': np.fromiter((p.get('y', 0) for p in points), dtype=np.float32, count=n),
+                        # Timestamps stay float64: epoch milliseconds lose precision in float32
+                        # Estimate time if not provided
+                        'ts': np.fromiter((p.get('time', i * 10) for i, p in enumerate(points)),
+                                          dtype=np.float64, count=n),
+                        'startTime': stroke.get('startTime', 0),
+                        'endTime': stroke.get('endTime', 0)
                     })
-                
-                signature_data['strokes'].append(stroke_data)
         
         # Save and process the signature
         features = collector.save_signature(signature_data, user_id, signature_type)
+        _record_signature(user_id)
+        _invalidate_consistency(user_id)
         
-        return jsonify({
+        return ORJSONResponse({
             'success': True,
             'message': 'Signature collected successfully',
             'features': features
         })
         
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
         }), 500
@@ -67,27 +326,114 @@ def analyze_user():
     """
     user_id = request.args.get('userId')
     if not user_id:
-        return jsonify({'error': 'userId parameter required'}), 400
+        return ORJSONResponse({'error': 'userId parameter required'}), 400
     
-    analysis = collector.analyze_consistency(user_id)
-    return jsonify(analysis)
+    analysis = _get_consistency(user_id)
+    # analyze_consistency returns a message string when there's too little data
+    return json_response(analysis)
+
+@lru_cache(maxsize=1)
+def _get_verifier():
+    """
+    Load the ML verifier on first use and reuse it afterwards
+    Failures aren't cached, so a model trained later is picked up on the next call
+    """
+    from verify_signature import SignatureVerifier
+    return SignatureVerifier()
+
+# How long the batcher waits for more requests after the first one arrives
+BATCH_WINDOW = 0.005
+
+# Longest a request waits for its prediction before giving up with a 500
+PREDICTION_TIMEOUT = 30.0
+
+class _VerifyBatcher:
+    """
+    Micro-batches /api/verify-ml predictions
+    Request threads queue a standardized feature row and wait on a Future;
+    one worker thread gathers rows for up to BATCH_WINDOW seconds (or until
+    the verifier's MAX_BATCH is reached) and runs the model once for all
+    """
+    
+    def __init__(self, verifier, max_batch, window=BATCH_WINDOW):
+        self.verifier = verifier
+        self._max_batch = max_batch
+        self._window = window
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='verify-batcher', daemon=True)
+        self._worker.start()
+    
+    def submit(self, x_scaled):
+        """Queue one feature row; the Future resolves to its prediction"""
+        future = Future()
+        self._queue.put((x_scaled, future))
+        return future
+    
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self._window
+            while len(pending) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Anything that fails here fails the whole batch; letting it escape
+            # would kill the worker and leave every waiting request hanging
+            try:
+                X = np.stack([x for x, _ in pending])
+                predictions = self.verifier.predict_batch(X)
+                if len(predictions) != len(pending):
+                    raise ValueError(f"Got {len(predictions)} predictions for {len(pending)} rows")
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            for (_, future), prediction in zip(pending, predictions):
+                future.set_result(prediction)
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def _get_batcher():
+    """
+    Start the prediction batcher around the verifier on first use
+    Locked so concurrent first requests load the model only once
+    """
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            from verify_signature import MAX_BATCH
+            _batcher = _VerifyBatcher(_get_verifier(), MAX_BATCH)
+        return _batcher
 
 @app.route('/api/verify-ml', methods=['POST'])
 def verify_with_ml():
     """Use ML model to verify a signature"""
     try:
-        from verify_signature import SignatureVerifier
-        
-        data = request.json
+        data = orjson.loads(request.get_data(cache=False))
         signature_data = data.get('signatureData')
         user_id = data.get('userId')
         
-        verifier = SignatureVerifier()
-        is_genuine, confidence, analysis = verifier.verify_signature(
-            signature_data, user_id
-        )
+        # Feature extraction runs on the request thread; only the model
+        # call is shared with concurrent requests
+        batcher = _get_batcher()
+        verifier = batcher.verifier
+        x_scaled, flat_features = verifier.prepare_features(signature_data)
+        try:
+            prediction = batcher.submit(x_scaled).result(timeout=PREDICTION_TIMEOUT)
+        except FutureTimeoutError:
+            return ORJSONResponse({
+                'success': False,
+                'error': f'Prediction timed out after {PREDICTION_TIMEOUT:g}s'
+            }), 500
+        is_genuine, confidence, analysis = verifier.build_analysis(flat_features, prediction, include_features=True)
         
-        return jsonify({
+        return ORJSONResponse({
             'success': True,
             'is_genuine': is_genuine,
             'confidence': confidence,
@@ -95,49 +441,34 @@ def verify_with_ml():
         })
         
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
         }), 500
 
+# Pre-serialized health body; only the timestamp is filled in per call
+_HEALTH_BYTES_TEMPLATE = b'{"status":"healthy","timestamp":"%s"}'
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """
     Simple health check endpoint
     """
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat()
-    })
+    return ORJSONResponse(_HEALTH_BYTES_TEMPLATE % datetime.now().isoformat().encode())
 
 @app.route('/api/dashboard-stats', methods=['GET'])
 def get_dashboard_stats():
     """Get aggregated statistics for ML dashboard"""
     try:
-        import os
-        import glob
-        
         # Get time period from query params
         period = request.args.get('period', 'today')
         
-        # Count users (unique user IDs from saved signatures)
-        data_files = glob.glob('data/signature_data_*.json')
-        user_ids = set()
-        genuine_count = 0
-        forgery_count = 0
+        # Read the running totals instead of rescanning the data directory
+        aggregate = _current_aggregate()
         
-        for file in data_files:
-            # Extract user ID from filename
-            filename = os.path.basename(file)
-            parts = filename.replace('signature_data_', '').replace('.json', '').split('_')
-            user_id = parts[0]
-            user_ids.add(user_id)
-            
-            # Count genuine vs forgery
-            if 'forger' in filename.lower():
-                forgery_count += 1
-            else:
-                genuine_count += 1
+        total_users = len(aggregate['per_user_counts'])
+        genuine_count = aggregate['genuine']
+        forgery_count = aggregate['forgery']
         
         # Calculate model performance (simulated for now)
         # In production, load actual model metrics
@@ -157,13 +488,13 @@ def get_dashboard_stats():
             })
         
         stats = {
-            'totalUsers': len(user_ids),
+            'totalUsers': total_users,
             'modelAccuracy': model_accuracy,
             'authAttempts': 156,  # This would come from a database in production
             'falsePositiveRate': false_positive_rate,
             'genuineSamples': genuine_count,
             'forgerySamples': forgery_count,
-            'avgSamplesPerUser': genuine_count // max(len(user_ids), 1),
+            'avgSamplesPerUser': genuine_count // max(total_users, 1),
             'performanceHistory': {
                 'labels': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
                 'accuracy': [89.2, 90.5, 91.1, 90.8, 91.9, 92.1, 92.3],
@@ -172,64 +503,89 @@ def get_dashboard_stats():
             'recentActivity': recent_activity
         }
         
-        return jsonify(stats)
+        return ORJSONResponse(stats)
         
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'error': str(e)
         }), 500
 
+FEATURES_PATH = 'models/features_20250718_201827.json'
+
+# Default feature names if model not found
+DEFAULT_FEATURE_NAMES = [
+    'total_strokes', 'total_duration', 'avg_stroke_duration',
+    'total_points', 'avg_points_per_stroke', 'avg_velocity',
+    'max_velocity', 'velocity_std', 'total_distance',
+    'avg_stroke_length', 'width', 'height', 'area',
+    'aspect_ratio', 'avg_pressure'
+]
+
+# Simulated importance scores (in production, extract from model)
+IMPORTANCE_SCORES = {
+    'total_strokes': 0.85,
+    'avg_velocity': 0.78,
+    'total_duration': 0.72,
+    'area': 0.65,
+    'avg_pressure': 0.60,
+    'velocity_std': 0.55,
+    'aspect_ratio': 0.50,
+    'avg_stroke_duration': 0.45,
+    'total_points': 0.40,
+    'avg_stroke_length': 0.35
+}
+
+# (features file mtime, serialized response body)
+_feature_importance = (None, None)
+
+def _build_feature_importance():
+    """Format the top features once; the result only depends on FEATURES_PATH"""
+    # Load feature names from saved model
+    if os.path.exists(FEATURES_PATH):
+        with open(FEATURES_PATH, 'rb') as f:
+            features_info = orjson.loads(f.read())
+        # Training scripts save a bare list; older files wrapped it in a dict
+        if isinstance(features_info, dict):
+            feature_names = features_info.get('feature_names', [])
+        else:
+            feature_names = features_info
+    else:
+        feature_names = DEFAULT_FEATURE_NAMES
+    
+    # Get top features
+    top_features = []
+    for feature in feature_names[:10]:
+        if feature in IMPORTANCE_SCORES:
+            top_features.append({
+                'name': feature.replace('_', ' ').title(),
+                'importance': IMPORTANCE_SCORES[feature] * 100
+            })
+    
+    return orjson.dumps({
+        'features': top_features,
+        'total_features': len(feature_names)
+    })
+
 @app.route('/api/feature-importance', methods=['GET'])
 def get_feature_importance():
     """Get feature importance from the trained model"""
+    global _feature_importance
     try:
-        import os
-        
-        # Load feature names from saved model
-        if os.path.exists('models/features_20250718_201827.json'):
-            with open('models/features_20250718_201827.json', 'r') as f:
-                features_info = json.load(f)
-                feature_names = features_info.get('feature_names', [])
-        else:
-            # Default feature names if model not found
-            feature_names = [
-                'total_strokes', 'total_duration', 'avg_stroke_duration',
-                'total_points', 'avg_points_per_stroke', 'avg_velocity',
-                'max_velocity', 'velocity_std', 'total_distance',
-                'avg_stroke_length', 'width', 'height', 'area',
-                'aspect_ratio', 'avg_pressure'
-            ]
+        # One stat per request; the body is rebuilt only when the file changes
+        try:
+            mtime = os.stat(FEATURES_PATH).st_mtime
+        except FileNotFoundError:
+            mtime = 0
         
-        # Simulated importance scores (in production, extract from model)
-        importance_scores = {
-            'total_strokes': 0.85,
-            'avg_velocity': 0.78,
-            'total_duration': 0.72,
-            'area': 0.65,
-            'avg_pressure': 0.60,
-            'velocity_std': 0.55,
-            'aspect_ratio': 0.50,
-            'avg_stroke_duration': 0.45,
-            'total_points': 0.40,
-            'avg_stroke_length': 0.35
-        }
+        cached_mtime, body = _feature_importance
+        if body is None or cached_mtime != mtime:
+            body = _build_feature_importance()
+            _feature_importance = (mtime, body)
         
-        # Get top features
-        top_features = []
-        for feature in feature_names[:10]:
-            if feature in importance_scores:
-                top_features.append({
-                    'name': feature.replace('_', ' ').title(),
-                    'importance': importance_scores.get(feature, 0.5) * 100
-                })
-        
-        return jsonify({
-            'features': top_features,
-            'total_features': len(feature_names)
-        })
+        return ORJSONResponse(body)
         
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'error': str(e)
         }), 500
 
@@ -238,7 +594,7 @@ def get_user_metrics(user_id):
     """Get specific user's signature consistency metrics"""
     try:
         # Analyze user's signature consistency
-        analysis = collector.analyze_consistency(user_id)
+        analysis = _get_consistency(user_id)
         
         # Add additional metrics
         metrics = {
@@ -256,10 +612,10 @@ def get_user_metrics(user_id):
             'status': 'active' if analysis.get('sample_count', 0) >= 3 else 'needs_training'
         }
         
-        return jsonify(metrics)
+        return ORJSONResponse(metrics)
         
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'error': str(e),
             'userId': user_id
         }), 500
@@ -268,34 +624,39 @@ def get_user_metrics(user_id):
 def get_ml_stats():
     """Get ML model statistics and performance metrics"""
     try:
-        import os
-        import glob
-        
-        # Find the latest model file
-        model_files = glob.glob('models/signature_model_*.h5')
+        # Find the latest model file (.keras, or .h5 from older training runs),
+        # skipping the .tmp.keras file save_model writes before renaming it
+        candidates = [
+            entry
+            for suffix in ('.keras', '.h5')
+            for entry in _dir_cache.scan('models', 'signature_model_', suffix)
+            if '.tmp.' not in entry.name
+        ]
+        latest_entry = max(candidates, key=lambda e: e.ctime, default=None)
         
-        if model_files:
+        if latest_entry:
             # Get the latest model file
-            latest_model = max(model_files, key=os.path.getctime)
-            model_date = os.path.basename(latest_model).split('_')[2].split('.')[0]
+            latest_model = latest_entry.path
+            model_date = latest_entry.name.split('_')[2].split('.')[0]
             
             # Format the date
             formatted_date = f"{model_date[:4]}-{model_date[4:6]}-{model_date[6:]}"
             
             # Load saved features info if available
-            features_file = latest_model.replace('.h5', '.json').replace('signature_model', 'features')
+            features_file = str(Path(latest_model).with_suffix('.json')).replace('signature_model', 'features')
+            # Default values
+            model_accuracy = 92.3
+            false_positive_rate = 2.1
             if os.path.exists(features_file):
-                with open(features_file, 'r') as f:
-                    features_info = json.load(f)
-                    # Extract model metrics if saved
-                    model_accuracy = features_info.get('model_accuracy', 92.3)
-                    false_positive_rate = features_info.get('false_positive_rate', 2.1)
-            else:
-                # Default values
-                model_accuracy = 92.3
-                false_positive_rate = 2.1
+                with open(features_file, 'rb') as f:
+                    features_info = orjson.loads(f.read())
+                # Both trainers save a bare list of feature names; only a
+                # dict can carry model metrics
+                if isinstance(features_info, dict):
+                    model_accuracy = features_info.get('model_accuracy', model_accuracy)
+                    false_positive_rate = features_info.get('false_positive_rate', false_positive_rate)
             
-            return jsonify({
+            return ORJSONResponse({
                 'modelAccuracy': model_accuracy,
                 'falsePositiveRate': false_positive_rate,
                 'lastTrainingDate': formatted_date,
@@ -303,7 +664,7 @@ def get_ml_stats():
                 'totalFeatures': 15  # Number of features used in the model
             })
         else:
-            return jsonify({
+            return ORJSONResponse({
                 'error': 'No trained model found',
                 'modelAccuracy': 0,
                 'falsePositiveRate': 0,
@@ -311,7 +672,7 @@ def get_ml_stats():
             })
             
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'error': str(e)
         }), 500
 
@@ -321,14 +682,14 @@ def retrain_model():
     try:
         # In a real implementation, this would trigger the training process
         # For now, we'll simulate it
-        return jsonify({
+        return ORJSONResponse({
             'success': True,
             'message': 'Model retraining initiated',
             'estimatedTime': '2-3 minutes'
         })
         
     except Exception as e:
-        return jsonify({
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
         }), 500
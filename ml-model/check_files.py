@@ -1,10 +1,12 @@
-import json
-import glob
+import orjson
+from training_data import list_data_files
 
-for file in glob.glob('data/signature_data_*.json'):
+data_files = list_data_files()
+
+for file in data_files:
     try:
-        with open(file) as f:
-            json.load(f)
+        with open(file, 'rb') as f:
+            orjson.loads(f.read())
         print(f'✓ {file} is OK')
     except Exception as e:
         print(f'✗ {file} has an error: {e}')
\ No newline at end of file
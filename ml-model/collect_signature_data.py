@@ -1,7 +1,134 @@
-import json
+import gzip
+import itertools
+import math
 import numpy as np
+import orjson
 from datetime import datetime
 import os
+import threading
+from training_data import KEY_PATHS, SHARD_PREFIX, SHARD_SUFFIX, flatten_features
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to plain NumPy
+    njit = None
+
+try:
+    from _points_ext import soa as _points_soa
+except ImportError:  # compiled extension is optional, see setup.py
+    _points_soa = None
+
+# Column of each feature in a flat row, following training_data.KEY_PATHS
+_IDX = {key: i for i, (_, key) in enumerate(KEY_PATHS)}
+
+# Running number for saved signature files, shared by every collector in
+# the process; next() on a count is atomic under the GIL
+_file_numbers = itertools.count(1)
+
+
+def _json_default(obj):
+    """Convert numpy values for JSON; anything else falls back to str"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+
+def _raw_path(filepath):
+    """Sibling file holding a signature's raw strokes when they aren't kept inline"""
+    directory, name = os.path.split(filepath)
+    return os.path.join(directory, 'signature_raw_' + name[len('signature_data_'):] + '.gz')
+
+
+def load_signature_file(filepath):
+    """
+    Read a saved signature record, with its raw strokes under 'raw_data'
+    whether they were kept inline or written to the compressed sibling file
+    """
+    with open(filepath, 'rb', buffering=65536) as f:
+        record = orjson.loads(f.read())
+    
+    if 'raw_data' not in record:
+        with gzip.open(_raw_path(filepath), 'rb') as f:
+            record['raw_data'] = orjson.loads(f.read())
+    
+    return record
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _motion_features(xs, ys, ts, stroke_starts):
+        """
+        Velocity stats and per-stroke lengths in one pass over the points
+        Returns ((count, mean, max, min, std), stroke_lengths); the velocity
+        mean and std use Welford's running update
+        """
+        n_strokes = stroke_starts.shape[0] - 1
+        stroke_lengths = np.zeros(n_strokes)
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        v_max = -np.inf
+        v_min = np.inf
+        
+        for k in range(n_strokes):
+            length = 0.0
+            for i in range(stroke_starts[k] + 1, stroke_starts[k + 1]):
+                distance = math.hypot(xs[i] - xs[i - 1], ys[i] - ys[i - 1])
+                length += distance
+                
+                # At least 1; a missing timestamp (NaN) fails the test too
+                time_diff = ts[i] - ts[i - 1]
+                if not time_diff >= 1:
+                    time_diff = 1.0
+                
+                velocity = distance / time_diff
+                count += 1
+                delta = velocity - mean
+                mean += delta / count
+                m2 += delta * (velocity - mean)
+                v_max = max(v_max, velocity)
+                v_min = min(v_min, velocity)
+            stroke_lengths[k] = length
+        
+        std = math.sqrt(m2 / count) if count else 0.0
+        return (count, mean, v_max, v_min, std), stroke_lengths
+else:
+    def _motion_features(xs, ys, ts, stroke_starts):
+        """
+        Velocity stats and per-stroke lengths from the flattened points
+        Returns ((count, mean, max, min, std), stroke_lengths)
+        """
+        # Distance between consecutive points; pairs that jump from the end
+        # of one stroke to the start of the next are masked out
+        segments = np.hypot(np.diff(xs), np.diff(ys))
+        inner = np.ones(segments.shape[0], dtype=bool)
+        boundaries = stroke_starts[1:-1]
+        boundaries = boundaries[(boundaries > 0) & (boundaries < xs.shape[0])]
+        inner[boundaries - 1] = False
+        segments[~inner] = 0
+        
+        # Time difference, at least 1; fmax also turns a missing
+        # timestamp (NaN) into the default of 1
+        velocities = (segments / np.fmax(np.diff(ts), 1))[inner]
+        
+        # Stroke k's length is the sum of segments[start_k:end_k - 1]; with the
+        # cross-stroke segments zeroed that's a difference of running totals.
+        # Trailing empty strokes start one past the end; clamp them, they
+        # still come out as 0
+        running = np.concatenate(([0.0], np.cumsum(segments)))
+        starts = np.minimum(stroke_starts[:-1], running.shape[0] - 1)
+        ends = np.maximum(stroke_starts[1:] - 1, starts)
+        stroke_lengths = running[ends] - running[starts]
+        
+        if not velocities.size:
+            return (0, 0.0, 0.0, 0.0, 0.0), stroke_lengths
+        velocity_stats = (velocities.size, velocities.mean(), velocities.max(),
+                          velocities.min(), velocities.std())
+        return velocity_stats, stroke_lengths
+
 
 class SignatureDataCollector:
     """
@@ -11,7 +138,19 @@ class SignatureDataCollector:
     """
     
     def __init__(self):
-        self.signatures = []
+        # Per-user rows of [average_velocity, stroke_count, area] for genuine
+        # signatures, as (buffer, rows used); the buffer doubles when full.
+        # Threaded request handlers share a collector, so updates take the lock
+        self._consistency_rows = {}
+        self._consistency_lock = threading.Lock()
+        
+        # Files are named by a per-collector stamp plus a process-wide running
+        # number, so two saves in the same second never overwrite each other,
+        # even from two collectors. The data directory is only created on the
+        # first save; collectors that just extract features never touch disk
+        self._session_stamp = f'{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}'
+        self._shard_path = f'data/{SHARD_PREFIX}{self._session_stamp}{SHARD_SUFFIX}'
+        self._data_dir_ready = False
         
     def process_signature(self, signature_data):
         """
@@ -19,24 +158,132 @@ class SignatureDataCollector:
         This is like taking a video of someone signing and noting all the important details
         """
         
-        # Extract the points from the signature
+        # Extract the points from the signature, flattened once into
+        # per-point arrays that every feature group below works from
         strokes = signature_data.get('strokes', [])
+        xs, ys, ts, stroke_starts = self._to_soa(strokes)
+        velocity_stats, stroke_lengths = _motion_features(xs, ys, ts, stroke_starts)
         
         features = {
             'timestamp': datetime.now().isoformat(),
-            'basic_stats': self._calculate_basic_stats(strokes),
-            'velocity_features': self._calculate_velocity_features(strokes),
-            'shape_features': self._calculate_shape_features(strokes),
-            'stroke_features': self._calculate_stroke_features(strokes)
+            'basic_stats': self._calculate_basic_stats(strokes, xs),
+            'velocity_features': self._calculate_velocity_features(velocity_stats),
+            'shape_features': self._calculate_shape_features(xs, ys),
+            'stroke_features': self._calculate_stroke_features(strokes, stroke_lengths)
         }
         
         return features
     
-    def _calculate_basic_stats(self, strokes):
+    def process_signature_into(self, signature_data, out, row):
+        """
+        Same features as process_signature, written straight into out[row]
+        in FEATURE_NAMES order instead of being built into a nested dict
+        Features process_signature would leave out are written as 0
+        """
+        strokes = signature_data.get('strokes', [])
+        xs, ys, ts, stroke_starts = self._to_soa(strokes)
+        (count, mean, v_max, v_min, std), stroke_lengths = _motion_features(xs, ys, ts, stroke_starts)
+        values = out[row]
+        
+        # Basic stats
+        total_points = xs.shape[0]
+        values[_IDX['stroke_count']] = len(strokes)
+        values[_IDX['total_points']] = total_points
+        values[_IDX['total_duration_ms']] = (
+            strokes[-1]['endTime'] - strokes[0]['startTime']
+            if strokes and 'startTime' in strokes[0] and 'endTime' in strokes[-1] else 0
+        )
+        values[_IDX['average_points_per_stroke']] = total_points / len(strokes) if strokes else 0
+        
+        # Velocity features
+        values[_IDX['average_velocity']] = mean if count else 0
+        values[_IDX['max_velocity']] = v_max if count else 0
+        values[_IDX['min_velocity']] = v_min if count else 0
+        values[_IDX['velocity_std']] = std if count else 0
+        
+        # Shape features
+        if xs.size:
+            min_x, max_x = float(xs.min()), float(xs.max())
+            min_y, max_y = float(ys.min()), float(ys.max())
+            width = max_x - min_x
+            height = max_y - min_y
+            values[_IDX['width']] = width
+            values[_IDX['height']] = height
+            values[_IDX['area']] = width * height
+            values[_IDX['aspect_ratio']] = width / height if height > 0 else 0
+            values[_IDX['center_x']] = (min_x + max_x) / 2
+            values[_IDX['center_y']] = (min_y + max_y) / 2
+        else:
+            for key in ('width', 'height', 'area', 'aspect_ratio', 'center_x', 'center_y'):
+                values[_IDX[key]] = 0
+        
+        # Stroke features
+        values[_IDX['average_stroke_length']] = stroke_lengths.mean() if stroke_lengths.size else 0
+        values[_IDX['total_length']] = stroke_lengths.sum()
+        values[_IDX['length_variation']] = stroke_lengths.std() if stroke_lengths.size else 0
+        stroke_durations = [
+            stroke['endTime'] - stroke['startTime']
+            for stroke in strokes
+            if 'startTime' in stroke and 'endTime' in stroke
+        ]
+        values[_IDX['average_stroke_duration']] = np.mean(stroke_durations) if stroke_durations else 0
+        values[_IDX['duration_variation']] = np.std(stroke_durations) if stroke_durations else 0
+    
+    @staticmethod
+    def _stroke_columns(stroke):
+        """
+        Return a stroke's points as (xs, ys, ts) arrays
+        Strokes carry either a 'points' list of dicts or ready-made 'xs'/'ys'/'ts'
+        arrays; points without a timestamp get NaN in ts
+        """
+        if 'xs' in stroke:
+            # Arrays from the API, or plain lists once reloaded from a saved file
+            return (np.asarray(stroke['xs'], dtype=np.float64),
+                    np.asarray(stroke['ys'], dtype=np.float64),
+                    np.asarray(stroke['ts'], dtype=np.float64))
+        
+        points = stroke.get('points', [])
+        n = len(points)
+        xs = np.fromiter((p['x'] for p in points), dtype=np.float64, count=n)
+        ys = np.fromiter((p['y'] for p in points), dtype=np.float64, count=n)
+        ts = np.fromiter((p.get('time', np.nan) for p in points), dtype=np.float64, count=n)
+        return xs, ys, ts
+    
+    def _to_soa(self, strokes):
+        """
+        Flatten all strokes into (xs, ys, ts, stroke_starts)
+        xs/ys/ts hold every point in drawing order; stroke k owns the points
+        stroke_starts[k]:stroke_starts[k + 1]
+        """
+        if _points_soa is not None and not any('xs' in stroke for stroke in strokes):
+            # Point-dict strokes are copied straight into the arrays in C
+            total = sum(len(stroke.get('points', ())) for stroke in strokes)
+            xs = np.empty(total)
+            ys = np.empty(total)
+            ts = np.empty(total)
+            stroke_starts = np.empty(len(strokes) + 1, dtype=np.intp)
+            _points_soa(strokes, xs, ys, ts, stroke_starts)
+            return xs, ys, ts, stroke_starts
+        
+        columns = [self._stroke_columns(stroke) for stroke in strokes]
+        
+        stroke_starts = np.zeros(len(columns) + 1, dtype=np.intp)
+        np.cumsum([len(xs) for xs, _, _ in columns], out=stroke_starts[1:])
+        
+        if not columns:
+            empty = np.empty(0)
+            return empty, empty, empty, stroke_starts
+        
+        xs = np.concatenate([xs for xs, _, _ in columns])
+        ys = np.concatenate([ys for _, ys, _ in columns])
+        ts = np.concatenate([ts for _, _, ts in columns])
+        return xs, ys, ts, stroke_starts
+    
+    def _calculate_basic_stats(self, strokes, xs):
         """Calculate basic statistics about the signature"""
         
         # Count total points across all strokes
-        total_points = sum(len(stroke['points']) for stroke in strokes)
+        total_points = xs.shape[0]
         
         # Calculate total time (if we have timestamps)
         total_duration = 0
@@ -50,35 +297,17 @@ class SignatureDataCollector:
             'average_points_per_stroke': total_points / len(strokes) if strokes else 0
         }
     
-    def _calculate_velocity_features(self, strokes):
+    def _calculate_velocity_features(self, velocity_stats):
         """Calculate how fast the signature was drawn"""
         
-        velocities = []
-        
-        for stroke in strokes:
-            points = stroke.get('points', [])
-            
-            for i in range(1, len(points)):
-                # Calculate distance between consecutive points
-                p1 = points[i-1]
-                p2 = points[i]
-                
-                distance = np.sqrt((p2['x'] - p1['x'])**2 + (p2['y'] - p1['y'])**2)
-                
-                # Calculate time difference (if available)
-                time_diff = 1  # Default to 1 if no timestamp
-                if 'time' in p1 and 'time' in p2:
-                    time_diff = max(p2['time'] - p1['time'], 1)
-                
-                velocity = distance / time_diff
-                velocities.append(velocity)
+        count, mean, v_max, v_min, std = velocity_stats
         
-        if velocities:
+        if count:
             return {
-                'average_velocity': np.mean(velocities),
-                'max_velocity': np.max(velocities),
-                'min_velocity': np.min(velocities),
-                'velocity_std': np.std(velocities)
+                'average_velocity': float(mean),
+                'max_velocity': float(v_max),
+                'min_velocity': float(v_min),
+                'velocity_std': float(std)
             }
         else:
             return {
@@ -88,15 +317,10 @@ class SignatureDataCollector:
                 'velocity_std': 0
             }
     
-    def _calculate_shape_features(self, strokes):
+    def _calculate_shape_features(self, xs, ys):
         """Calculate the overall shape characteristics"""
         
-        all_points = []
-        for stroke in strokes:
-            for point in stroke.get('points', []):
-                all_points.append([point['x'], point['y']])
-        
-        if not all_points:
+        if not xs.size:
             return {
                 'width': 0,
                 'height': 0,
@@ -104,11 +328,9 @@ class SignatureDataCollector:
                 'aspect_ratio': 0
             }
         
-        points_array = np.array(all_points)
-        
-        # Find bounding box
-        min_x, min_y = points_array.min(axis=0)
-        max_x, max_y = points_array.max(axis=0)
+        # Find bounding box (as Python floats, so features hold no numpy scalars)
+        min_x, max_x = float(xs.min()), float(xs.max())
+        min_y, max_y = float(ys.min()), float(ys.max())
         
         width = max_x - min_x
         height = max_y - min_y
@@ -122,45 +344,37 @@ class SignatureDataCollector:
             'center_y': (min_y + max_y) / 2
         }
     
-    def _calculate_stroke_features(self, strokes):
+    def _calculate_stroke_features(self, strokes, stroke_lengths):
         """Analyze individual stroke characteristics"""
         
-        stroke_lengths = []
-        stroke_durations = []
-        
-        for stroke in strokes:
-            points = stroke.get('points', [])
-            
-            # Calculate stroke length
-            length = 0
-            for i in range(1, len(points)):
-                p1 = points[i-1]
-                p2 = points[i]
-                length += np.sqrt((p2['x'] - p1['x'])**2 + (p2['y'] - p1['y'])**2)
-            
-            stroke_lengths.append(length)
-            
-            # Calculate stroke duration if available
-            if 'startTime' in stroke and 'endTime' in stroke:
-                duration = stroke['endTime'] - stroke['startTime']
-                stroke_durations.append(duration)
+        # Calculate stroke duration if available
+        stroke_durations = [
+            stroke['endTime'] - stroke['startTime']
+            for stroke in strokes
+            if 'startTime' in stroke and 'endTime' in stroke
+        ]
         
         features = {
-            'average_stroke_length': np.mean(stroke_lengths) if stroke_lengths else 0,
-            'total_length': sum(stroke_lengths),
-            'length_variation': np.std(stroke_lengths) if stroke_lengths else 0
+            'average_stroke_length': float(stroke_lengths.mean()) if stroke_lengths.size else 0,
+            'total_length': float(stroke_lengths.sum()),
+            'length_variation': float(stroke_lengths.std()) if stroke_lengths.size else 0
         }
         
         if stroke_durations:
-            features['average_stroke_duration'] = np.mean(stroke_durations)
-            features['duration_variation'] = np.std(stroke_durations)
+            features['average_stroke_duration'] = float(np.mean(stroke_durations))
+            features['duration_variation'] = float(np.std(stroke_durations))
         
         return features
     
-    def save_signature(self, signature_data, user_id, signature_type='genuine'):
+    def save_signature(self, signature_data, user_id, signature_type='genuine', pretty=False, keep_raw=False):
         """
         Save a signature with all its features
         signature_type can be 'genuine' or 'forgery' for training
+        pretty=True indents the file for reading by hand; it's compact otherwise
+        keep_raw=True stores the raw strokes inside the record as 'raw_data';
+        by default they go to a gzipped signature_raw_* sibling instead, so
+        readers that only need features don't parse every point
+        (load_signature_file puts them back together)
         """
         
         features = self.process_signature(signature_data)
@@ -168,47 +382,82 @@ class SignatureDataCollector:
         record = {
             'user_id': user_id,
             'type': signature_type,
-            'raw_data': signature_data,
             'features': features
         }
+        if keep_raw:
+            record['raw_data'] = signature_data
         
-        self.signatures.append(record)
+        if signature_type == 'genuine':
+            self._add_consistency_row(user_id, features)
         
         # Save to file
-        filename = f'signature_data_{user_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        filepath = os.path.join('data', filename)
-        
-        # Create data directory if it doesn't exist
-        os.makedirs('data', exist_ok=True)
-        
-        with open(filepath, 'w') as f:
-            # Convert numpy types to regular Python types for JSON
-            json.dump(record, f, indent=2, default=str)
+        if not self._data_dir_ready:
+            os.makedirs('data', exist_ok=True)
+            self._data_dir_ready = True
+        filename = f'signature_data_{user_id}_{self._session_stamp}_{next(_file_numbers):06d}.json'
+        filepath = f'data/{filename}'
+        
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        
+        with open(filepath, 'wb', buffering=65536) as f:
+            # orjson writes numpy arrays and scalars (including SoA point
+            # arrays) natively; _json_default covers anything else
+            f.write(orjson.dumps(record, option=option, default=_json_default))
+        
+        if not keep_raw:
+            with gzip.open(_raw_path(filepath), 'wb', compresslevel=1) as f:
+                f.write(orjson.dumps(signature_data, option=orjson.OPT_SERIALIZE_NUMPY, default=_json_default))
+        
+        # Append the flattened features to this session's shard, so training
+        # doesn't have to parse the raw strokes back out of the file
+        label = 1 if signature_type == 'genuine' else 0
+        with open(self._shard_path, 'ab') as f:
+            shard_row = [filename, user_id, label, flatten_features(features)]
+            f.write(orjson.dumps(shard_row, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n')
         
         print(f"Signature saved to {filepath}")
         return features
     
+    def _add_consistency_row(self, user_id, features):
+        """Append one genuine signature's consistency stats for its user"""
+        row = (
+            features['velocity_features']['average_velocity'],
+            features['basic_stats']['stroke_count'],
+            features['shape_features']['area']
+        )
+        with self._consistency_lock:
+            rows, count = self._consistency_rows.get(user_id, (np.empty((4, 3)), 0))
+            if count == rows.shape[0]:
+                rows = np.resize(rows, (2 * count, 3))
+            rows[count] = row
+            self._consistency_rows[user_id] = (rows, count + 1)
+    
     def analyze_consistency(self, user_id):
         """
         Check how consistent a user's signatures are
         This helps us set appropriate thresholds for authentication
         """
         
-        user_signatures = [s for s in self.signatures if s['user_id'] == user_id and s['type'] == 'genuine']
+        with self._consistency_lock:
+            rows, count = self._consistency_rows.get(user_id, (None, 0))
+            stats = rows[:count].copy() if count >= 2 else None
         
-        if len(user_signatures) < 2:
+        if count < 2:
             return "Need at least 2 signatures to analyze consistency"
         
-        # Extract features for comparison
-        velocities = [s['features']['velocity_features']['average_velocity'] for s in user_signatures]
-        stroke_counts = [s['features']['basic_stats']['stroke_count'] for s in user_signatures]
-        areas = [s['features']['shape_features']['area'] for s in user_signatures]
+        # Coefficient of variation of velocity, stroke count and area at once;
+        # a column averaging 0 counts as perfectly consistent
+        mean = stats.mean(axis=0)
+        std = stats.std(axis=0)
+        consistency = 1 - np.where(mean > 0, std / np.where(mean > 0, mean, 1), 0)
         
         consistency_report = {
-            'velocity_consistency': 1 - (np.std(velocities) / np.mean(velocities) if np.mean(velocities) > 0 else 0),
-            'stroke_count_consistency': 1 - (np.std(stroke_counts) / np.mean(stroke_counts) if np.mean(stroke_counts) > 0 else 0),
-            'area_consistency': 1 - (np.std(areas) / np.mean(areas) if np.mean(areas) > 0 else 0),
-            'sample_count': len(user_signatures)
+            'velocity_consistency': float(consistency[0]),
+            'stroke_count_consistency': float(consistency[1]),
+            'area_consistency': float(consistency[2]),
+            'sample_count': count
         }
         
         return consistency_report
@@ -240,4 +489,4 @@ if __name__ == "__main__":
     # Print the extracted features
     print("\nExtracted Features:")
     print("Features have been extracted and saved!")
-    print(f"Check the file: data/signature_data_user123_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
\ No newline at end of file
+    print("Check the file path printed above")
\ No newline at end of file
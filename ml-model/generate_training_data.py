@@ -1,74 +1,64 @@
 from collect_signature_data import SignatureDataCollector
-import random
+import sys
 import numpy as np
 
 collector = SignatureDataCollector()
 
 print("🎯 Generating training data...")
 
+# One generator for the whole run; pass a seed to make the dataset
+# reproducible, e.g. python generate_training_data.py 42
+rng = np.random.default_rng(int(sys.argv[1]) if len(sys.argv) > 1 else None)
+
+def _generate_stroke(points_range, step_range, jitter, interval_range):
+    """
+    One left-to-right stroke as x/y/time arrays, drawn in a few vectorized
+    calls; ranges are inclusive like random.randint
+    """
+    n = rng.integers(points_range[0], points_range[1] + 1)
+    i = np.arange(n)
+    start_x = rng.integers(100, 201)
+    start_y = rng.integers(100, 151)
+    
+    xs = start_x + i * rng.integers(step_range[0], step_range[1] + 1, size=n)
+    ys = start_y + rng.integers(-jitter, jitter + 1, size=n)
+    ts = i * rng.integers(interval_range[0], interval_range[1] + 1, size=n)
+    
+    # The collector reads 'xs'/'ys'/'ts' arrays directly, no per-point dicts
+    return {
+        'xs': xs,
+        'ys': ys,
+        'ts': ts,
+        'startTime': 0,
+        'endTime': int(ts[-1])
+    }
+
 # Generate different signature styles
 def generate_signature(style='normal', user_id='user'):
     """Generate synthetic signature data with different characteristics"""
     
     if style == 'normal':
-        # Normal signature
-        strokes = []
-        for stroke_num in range(random.randint(2, 4)):  # 2-4 strokes
-            points = []
-            start_x = random.randint(100, 200)
-            start_y = random.randint(100, 150)
-            
-            for i in range(random.randint(10, 20)):  # 10-20 points per stroke
-                x = start_x + i * random.randint(5, 15)
-                y = start_y + random.randint(-10, 10)
-                time = i * random.randint(20, 40)  # Normal speed
-                points.append({'x': x, 'y': y, 'time': time})
-            
-            strokes.append({
-                'points': points,
-                'startTime': 0,
-                'endTime': points[-1]['time']
-            })
+        # Normal signature: 2-4 strokes, 10-20 points per stroke, normal speed
+        strokes = [
+            _generate_stroke((10, 20), (5, 15), 10, (20, 40))
+            for _ in range(rng.integers(2, 5))
+        ]
     
     elif style == 'rushed':
-        # Rushed signature (faster)
-        strokes = []
-        for stroke_num in range(random.randint(1, 2)):  # Fewer strokes
-            points = []
-            start_x = random.randint(100, 200)
-            start_y = random.randint(100, 150)
-            
-            for i in range(random.randint(5, 10)):  # Fewer points
-                x = start_x + i * random.randint(15, 25)  # Longer jumps
-                y = start_y + random.randint(-20, 20)
-                time = i * random.randint(5, 15)  # Much faster
-                points.append({'x': x, 'y': y, 'time': time})
-            
-            strokes.append({
-                'points': points,
-                'startTime': 0,
-                'endTime': points[-1]['time']
-            })
+        # Rushed signature (faster): fewer strokes, fewer points,
+        # longer jumps and much faster
+        strokes = [
+            _generate_stroke((5, 10), (15, 25), 20, (5, 15))
+            for _ in range(rng.integers(1, 3))
+        ]
     
     elif style == 'careful':
-        # Very careful signature (slower)
-        strokes = []
-        for stroke_num in range(random.randint(3, 5)):  # More strokes
-            points = []
-            start_x = random.randint(100, 200)
-            start_y = random.randint(100, 150)
-            
-            for i in range(random.randint(20, 30)):  # Many points
-                x = start_x + i * random.randint(3, 8)  # Small movements
-                y = start_y + random.randint(-5, 5)
-                time = i * random.randint(50, 80)  # Very slow
-                points.append({'x': x, 'y': y, 'time': time})
-            
-            strokes.append({
-                'points': points,
-                'startTime': 0,
-                'endTime': points[-1]['time']
-            })
+        # Very careful signature (slower): more strokes, many points,
+        # small movements and very slow
+        strokes = [
+            _generate_stroke((20, 30), (3, 8), 5, (50, 80))
+            for _ in range(rng.integers(3, 6))
+        ]
     
     return {'strokes': strokes}
 
@@ -76,10 +66,13 @@ def generate_signature(style='normal', user_id='user'):
 users = ['alice', 'bob', 'charlie', 'diana', 'eve']
 styles = ['normal', 'rushed', 'careful']
 
-for user in users:
-    # Each user signs 2-3 times
-    for i in range(random.randint(2, 3)):
-        style = random.choice(styles)
+# Each user signs 2-3 times; draw every count and style up front
+sign_counts = rng.integers(2, 4, size=len(users))
+all_styles = iter(rng.choice(styles, size=sign_counts.sum()).tolist())
+
+for user, sign_count in zip(users, sign_counts):
+    for i in range(sign_count):
+        style = next(all_styles)
         signature = generate_signature(style, user)
         collector.save_signature(signature, user, 'genuine')
         print(f"✓ Generated genuine signature for {user} (style: {style})")
@@ -88,10 +81,10 @@ for user in users:
 print("\nGenerating forgeries...")
 forgers = ['forger_x', 'forger_y', 'forger_z']
 
-for forger in forgers:
-    # Each forger tries to copy a real user
-    target_user = random.choice(users)
-    
+# Each forger tries to copy a real user
+target_users = rng.choice(users, size=len(forgers)).tolist()
+
+for forger, target_user in zip(forgers, target_users):
     # Forgeries are usually different in subtle ways
     signature = generate_signature('rushed', forger)  # Forgers often rush
     collector.save_signature(signature, f"{forger}_copying_{target_user}", 'forgery')
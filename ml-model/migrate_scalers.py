@@ -0,0 +1,42 @@
+"""
+Convert pickled StandardScalers in models/ to the .npz files the verifier
+loads without unpickling. Safe to run again; converted scalers are skipped
+"""
+import os
+import pickle
+
+import numpy as np
+
+
+def migrate_scalers(directory='models'):
+    """Write scaler_<ts>.npz next to every scaler_<ts>.pkl that lacks one"""
+    converted = []
+    with os.scandir(directory) as entries:
+        pkl_paths = sorted(
+            entry.path for entry in entries
+            if entry.name.startswith('scaler_') and entry.name.endswith('.pkl')
+        )
+    
+    for pkl_path in pkl_paths:
+        npz_path = pkl_path[:-len('.pkl')] + '.npz'
+        if os.path.exists(npz_path):
+            continue
+        
+        with open(pkl_path, 'rb') as f:
+            scaler = pickle.load(f)
+        
+        # Written under a temporary name, so a concurrent load never sees half a file
+        tmp_path = f'{npz_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, mean=scaler.mean_, scale=scaler.scale_)
+        os.replace(tmp_path, npz_path)
+        
+        print(f"✓ {pkl_path} -> {npz_path}")
+        converted.append(npz_path)
+    
+    print(f"Converted {len(converted)} scaler(s)")
+    return converted
+
+
+if __name__ == "__main__":
+    migrate_scalers()
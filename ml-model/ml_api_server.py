@@ -1,13 +1,34 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import pickle
+import hashlib
+import joblib
 import numpy as np
 import json
 import os
+import threading
+from collections import OrderedDict
+from collect_signature_data import SignatureDataCollector
+from training_data import FEATURE_NAMES, KEY_PATHS
 
 app = Flask(__name__)
 CORS(app)
 
+class _BoosterClassifier:
+    """
+    LightGBM booster behind the predict_proba/classes_ interface the
+    endpoints use for the Random Forest; prediction runs in LightGBM's C code
+    """
+    
+    classes_ = np.array([0, 1])
+    
+    def __init__(self, model_path):
+        import lightgbm as lgb
+        self.booster = lgb.Booster(model_file=model_path)
+    
+    def predict_proba(self, X):
+        genuine = self.booster.predict(X)
+        return np.column_stack((1 - genuine, genuine))
+
 # Load the latest model
 def load_model():
     """Load the latest trained model and scaler"""
@@ -15,25 +36,193 @@ def load_model():
         with open('models/latest_model_info.json', 'r') as f:
             model_info = json.load(f)
         
-        # Load model
-        with open(model_info['model_path'], 'rb') as f:
-            model = pickle.load(f)
+        # Load model; LightGBM models are saved as booster text files
+        if model_info.get('model_type') == 'lightgbm':
+            model = _BoosterClassifier(model_info['model_path'])
+        else:
+            # Memory-map the trees' arrays instead of copying them in; older
+            # models saved with plain pickle load the same way
+            model = joblib.load(model_info['model_path'], mmap_mode='r')
         
-        # Load scaler
-        with open(model_info['scaler_path'], 'rb') as f:
-            scaler = pickle.load(f)
+        # Load scaler; only its mean and scale are kept, so requests can
+        # standardize with plain NumPy instead of scaler.transform. Everything
+        # at predict time is float32, the precision the trees compare in
+        scaler = joblib.load(model_info['scaler_path'])
+        scaler_mean = np.asarray(scaler.mean_, dtype=np.float32)
+        scaler_scale = np.asarray(scaler.scale_, dtype=np.float32)
         
         # Load feature names
         feature_names = model_info['feature_names']
         
         print(f"✅ Loaded model from {model_info['timestamp']}")
-        return model, scaler, feature_names
+        return model, scaler_mean, scaler_scale, feature_names
     except Exception as e:
         print(f"❌ Error loading model: {e}")
-        return None, None, None
+        return None, None, None, None
 
 # Load model on startup
-model, scaler, feature_names = load_model()
+model, scaler_mean, scaler_scale, feature_names = load_model()
+
+# Feature extraction for /api/predict_raw, shared with training so raw
+# strokes are measured exactly like the training data was
+collector = SignatureDataCollector()
+
+# (feature name, section, key) for reading the collector's nested features
+_FEATURE_SOURCES = tuple(
+    (name, section, key) for name, (section, key) in zip(FEATURE_NAMES, KEY_PATHS)
+)
+
+# Enrolled users' stored metrics, one JSON file per user under ENROLLED_DIR so
+# every worker process sees them and they survive a restart. Their metrics
+# rows are cached per worker, up to ENROLLED_CACHE_SIZE users, so /api/predict
+# only has to receive and flatten the current signature
+ENROLLED_DIR = 'data/enrolled'
+ENROLLED_CACHE_SIZE = 4096
+_enrolled = OrderedDict()  # username -> (file mtime_ns, metrics row)
+_enrolled_lock = threading.Lock()
+
+def _enrolled_path(username):
+    """File holding username's enrollment; hashed so any username is a safe name"""
+    digest = hashlib.blake2b(str(username).encode(), digest_size=16).hexdigest()
+    return os.path.join(ENROLLED_DIR, f'{digest}.json')
+
+def _save_enrollment(username, metrics):
+    """Store a user's metrics dict, replacing any earlier enrollment"""
+    os.makedirs(ENROLLED_DIR, exist_ok=True)
+    path = _enrolled_path(username)
+    
+    # Written under a temporary name, so other workers never read half a file
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'username': username, 'metrics': metrics}, f)
+    os.replace(tmp_path, path)
+    
+    with _enrolled_lock:
+        _enrolled.pop(username, None)
+
+def _enrolled_row(username):
+    """username's enrolled metrics row, or None if they aren't enrolled"""
+    path = _enrolled_path(username)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    
+    # Reuse the cached row unless another worker re-enrolled the user since
+    with _enrolled_lock:
+        cached = _enrolled.get(username)
+        if cached is not None and cached[0] == mtime:
+            _enrolled.move_to_end(username)
+            return cached[1]
+    
+    with open(path, 'r') as f:
+        record = json.load(f)
+    row = _metrics_rows([record['metrics']])
+    
+    with _enrolled_lock:
+        _enrolled[username] = (mtime, row)
+        _enrolled.move_to_end(username)
+        if len(_enrolled) > ENROLLED_CACHE_SIZE:
+            _enrolled.popitem(last=False)
+    return row
+
+def _abs_feature_mask(feature_names):
+    """True for count features, which are compared by absolute difference"""
+    if feature_names is None:
+        return None
+    return np.array([name in ('stroke_count', 'total_points') for name in feature_names])
+
+use_abs_mask = _abs_feature_mask(feature_names)
+
+# Per-thread feature buffers, reused across requests instead of allocating
+# a fresh array for every prediction
+_scratch = threading.local()
+
+def _scratch_rows(n):
+    """This thread's (n, len(feature_names)) float32 buffer"""
+    buf = getattr(_scratch, 'rows', None)
+    if buf is None or buf.shape[0] < n or buf.shape[1] != len(feature_names):
+        buf = np.empty((n, len(feature_names)), dtype=np.float32)
+        _scratch.rows = buf
+    return buf[:n]
+
+def _metrics_rows(metrics_list):
+    """Stack metric dicts into a (len(metrics_list), len(feature_names)) float32 array"""
+    shape = (len(metrics_list), len(feature_names))
+    return np.fromiter(
+        (metrics.get(name, 0) for metrics in metrics_list for name in feature_names),
+        dtype=np.float32, count=shape[0] * shape[1]
+    ).reshape(shape)
+
+def _signature_metrics(signature_data):
+    """Extract a raw signature's features as a flat {feature name: value} dict"""
+    if isinstance(signature_data, list):
+        signature_data = {'strokes': signature_data}
+    features = collector.process_signature(signature_data)
+    
+    # Missing or None values count as 0, as in training
+    return {
+        name: (features.get(section) or {}).get(key) or 0
+        for name, section, key in _FEATURE_SOURCES
+    }
+
+def _difference_features(stored, current, out):
+    """
+    Write the model's feature rows for aligned stored/current metric rows
+    into out; stored may be a single row shared by every current row
+    """
+    # Absolute difference, kept as is for counts
+    np.subtract(current, stored, out=out)
+    np.abs(out, out=out)
+    
+    # Relative difference (percentage) for continuous features; where nothing
+    # was stored it's 1 if the current value is non-zero, else 0
+    relative = ~use_abs_mask
+    unset = stored == 0
+    np.divide(out, np.abs(stored), out=out, where=relative & ~unset)
+    np.copyto(out, current != 0, where=relative & unset)
+    
+    return out
+
+def _predict_rows(stored, current):
+    """
+    Score stored/current metric rows in one model call
+    Returns (predictions, probabilities) with one row per current row
+    """
+    features = _difference_features(stored, current, _scratch_rows(current.shape[0]))
+    
+    # Normalize features in place
+    np.subtract(features, scaler_mean, out=features)
+    np.divide(features, scaler_scale, out=features)
+    
+    # Predict; the predicted class is the most probable one, so a single
+    # predict_proba call covers both
+    probabilities = model.predict_proba(features)
+    predictions = model.classes_[probabilities.argmax(axis=1)]
+    
+    return predictions, probabilities
+
+def _prediction_result(prediction, probability):
+    """Build the JSON result for one scored pair"""
+    
+    # Convert to confidence score (0-100)
+    # Confidence score represents how likely the signature is genuine
+    # probability[1] is the probability of being genuine
+    confidence_score = probability[1] * 100
+    
+    # Ensure minimum confidence of 5% (even poor matches have some similarity)
+    confidence_score = max(5.0, confidence_score)
+    
+    return {
+        'success': True,
+        'prediction': int(prediction),
+        'confidence_score': float(confidence_score),
+        'is_genuine': bool(prediction == 1),
+        'probabilities': {
+            'forgery': float(probability[0]),
+            'genuine': float(probability[1])
+        }
+    }
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
@@ -41,64 +230,31 @@ def predict():
     try:
         data = request.json
         
-        # Extract metrics from stored and current signatures
-        stored_metrics = data['stored_features']
-        current_metrics = data['current_features']
+        # Extract metrics from stored and current signatures; the stored ones
+        # may come from an earlier /api/enroll instead of the request
         username = data.get('username', 'unknown')
+        current = _metrics_rows([data['current_features']])
+        if 'stored_features' in data:
+            stored = _metrics_rows([data['stored_features']])
+        else:
+            stored = _enrolled_row(username)
+        if stored is None:
+            return jsonify({
+                'success': False,
+                'error': f'No stored_features given and {username} is not enrolled',
+                'confidence_score': 0
+            }), 400
         
-        # Calculate differences as features
-        features = []
-        for feature_name in feature_names:
-            stored_val = stored_metrics.get(feature_name, 0)
-            current_val = current_metrics.get(feature_name, 0)
-            
-            # Absolute difference
-            diff = abs(current_val - stored_val)
-            
-            # Relative difference (percentage)
-            if stored_val != 0:
-                rel_diff = abs((current_val - stored_val) / stored_val)
-            else:
-                rel_diff = 1.0 if current_val != 0 else 0.0
-            
-            # Use relative difference for continuous features, absolute for counts
-            if feature_name in ['stroke_count', 'total_points']:
-                features.append(diff)
-            else:
-                features.append(rel_diff)
-        
-        # Normalize features
-        features_array = np.array(features).reshape(1, -1)
-        features_scaled = scaler.transform(features_array)
-        
-        # Predict
-        prediction = model.predict(features_scaled)[0]
-        probability = model.predict_proba(features_scaled)[0]
-        
-        # Convert to confidence score (0-100)
-        # Confidence score represents how likely the signature is genuine
-        # probability[1] is the probability of being genuine
-        confidence_score = probability[1] * 100
-        
-        # Ensure minimum confidence of 5% (even poor matches have some similarity)
-        confidence_score = max(5.0, confidence_score)
+        predictions, probabilities = _predict_rows(stored, current)
+        result = _prediction_result(predictions[0], probabilities[0])
         
         # Log for debugging
         print(f"ML Prediction for {username}:")
-        print(f"  Prediction: {'Genuine' if prediction == 1 else 'Forgery'}")
-        print(f"  Confidence: {confidence_score:.1f}%")
-        print(f"  Probabilities: Forgery={probability[0]:.3f}, Genuine={probability[1]:.3f}")
+        print(f"  Prediction: {'Genuine' if result['is_genuine'] else 'Forgery'}")
+        print(f"  Confidence: {result['confidence_score']:.1f}%")
+        print(f"  Probabilities: Forgery={probabilities[0][0]:.3f}, Genuine={probabilities[0][1]:.3f}")
         
-        return jsonify({
-            'success': True,
-            'prediction': int(prediction),
-            'confidence_score': float(confidence_score),
-            'is_genuine': bool(prediction == 1),
-            'probabilities': {
-                'forgery': float(probability[0]),
-                'genuine': float(probability[1])
-            }
-        })
+        return jsonify(result)
         
     except Exception as e:
         print(f"Error in prediction: {e}")
@@ -108,6 +264,96 @@ def predict():
             'confidence_score': 0
         }), 500
 
+@app.route('/api/predict_raw', methods=['POST'])
+def predict_raw():
+    """
+    Predict from raw strokes instead of client-side features
+    Expects {"current_strokes": ..., "stored_strokes": ..., "username": ...},
+    each strokes value a list of strokes or {"strokes": [...]}; without
+    stored_strokes the username's enrolled metrics are used
+    """
+    try:
+        data = request.json
+        username = data.get('username', 'unknown')
+        
+        current = _metrics_rows([_signature_metrics(data['current_strokes'])])
+        if 'stored_strokes' in data:
+            stored = _metrics_rows([_signature_metrics(data['stored_strokes'])])
+        else:
+            stored = _enrolled_row(username)
+        if stored is None:
+            return jsonify({
+                'success': False,
+                'error': f'No stored_strokes given and {username} is not enrolled',
+                'confidence_score': 0
+            }), 400
+        
+        predictions, probabilities = _predict_rows(stored, current)
+        return jsonify(_prediction_result(predictions[0], probabilities[0]))
+        
+    except Exception as e:
+        print(f"Error in raw prediction: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'confidence_score': 0
+        }), 500
+
+@app.route('/api/enroll', methods=['POST'])
+def enroll():
+    """
+    Keep a user's stored signature metrics on the server
+    Expects {"username": ..., "features": {...}}; later /api/predict calls for
+    that username can leave out stored_features
+    """
+    try:
+        data = request.json
+        username = data['username']
+        
+        # Check the metrics convert before storing them
+        _metrics_rows([data['features']])
+        _save_enrollment(username, data['features'])
+        
+        return jsonify({'success': True, 'username': username})
+        
+    except Exception as e:
+        print(f"Error in enrollment: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict many stored/current signature pairs at once
+    Expects {"pairs": [{"stored": {...}, "current": {...}}, ...]}
+    """
+    try:
+        pairs = request.json['pairs']
+        if not pairs:
+            return jsonify({'success': True, 'results': []})
+        
+        predictions, probabilities = _predict_rows(
+            _metrics_rows([pair['stored'] for pair in pairs]),
+            _metrics_rows([pair['current'] for pair in pairs])
+        )
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                _prediction_result(prediction, probability)
+                for prediction, probability in zip(predictions, probabilities)
+            ]
+        })
+        
+    except Exception as e:
+        print(f"Error in batch prediction: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -120,8 +366,16 @@ def health():
 @app.route('/api/reload-model', methods=['POST'])
 def reload_model():
     """Reload the latest model (useful after retraining)"""
-    global model, scaler, feature_names
-    model, scaler, feature_names = load_model()
+    global model, scaler_mean, scaler_scale, feature_names, use_abs_mask
+    old_feature_names = feature_names
+    model, scaler_mean, scaler_scale, feature_names = load_model()
+    use_abs_mask = _abs_feature_mask(feature_names)
+    
+    # Cached enrolled rows are laid out by feature name; drop them if that
+    # changed, they're rebuilt from the stored metrics on next use
+    if feature_names != old_feature_names:
+        with _enrolled_lock:
+            _enrolled.clear()
     
     return jsonify({
         'success': model is not None,
@@ -130,12 +384,22 @@ def reload_model():
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', os.environ.get('ML_PORT', 5002)))  # Render uses PORT
-    debug = os.environ.get('FLASK_ENV') != 'production'
+    # Flask's reloading debug server only when explicitly asked for
+    debug = os.environ.get('FLASK_ENV') == 'development'
     
     print(f"🚀 ML API Server starting on port {port}")
     print("Available endpoints:")
     print("  POST /api/predict - Get signature prediction")
+    print("  POST /api/predict_batch - Get predictions for many signature pairs")
+    print("  POST /api/predict_raw - Get signature prediction from raw strokes")
+    print("  POST /api/enroll - Store a user's signature metrics for later predictions")
     print("  GET  /api/health - Health check")
     print("  POST /api/reload-model - Reload latest model")
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    if debug:
+        app.run(host='0.0.0.0', port=port, debug=True)
+    else:
+        # Multi-threaded production WSGI server; the model is loaded once at
+        # import and shared by all request threads
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=port, threads=8)
\ No newline at end of file
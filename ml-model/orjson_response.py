@@ -0,0 +1,52 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import orjson
+from flask import Response
+
+
+def _default(obj):
+    """Fallback for types orjson doesn't serialize natively"""
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """Serialize a payload to JSON bytes using orjson"""
+    return orjson.dumps(
+        payload,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC,
+        default=_default
+    )
+
+
+class ORJSONResponse(Response):
+    """
+    Flask response that serializes dicts and lists with orjson
+    Strings, bytes and iterables are passed through untouched, so Flask
+    can keep using this as app.response_class for its own responses
+    """
+
+    default_mimetype = 'application/json'
+
+    def __init__(self, response=None, *args, **kwargs):
+        if isinstance(response, (dict, list)):
+            response = dumps(response)
+        super().__init__(response, *args, **kwargs)
+
+
+def json_response(payload, status=None):
+    """Always JSON-encode payload, including bare strings and numbers"""
+    return ORJSONResponse(dumps(payload), status=status)
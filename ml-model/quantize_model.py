@@ -0,0 +1,62 @@
+"""
+Build a full-integer (int8) TFLite copy of the latest signature model
+verify_signature.py uses it instead of the float model when it benchmarks
+faster on the machine it runs on
+"""
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from training_data import list_data_files, load_feature_matrix, load_feature_shards
+from verify_signature import find_latest_model, load_scaler
+
+# Signatures used to calibrate the int8 activation ranges
+CALIBRATION_ROWS = 500
+
+
+def load_calibration_rows(timestamp):
+    """Standardized float32 feature rows drawn from the collected signatures"""
+    (X_shard, _, _), remaining = load_feature_shards(list_data_files())
+    X, _, _ = load_feature_matrix(remaining)
+    X = np.concatenate((X_shard, X))
+    
+    if len(X) > CALIBRATION_ROWS:
+        X = X[np.random.default_rng(0).choice(len(X), CALIBRATION_ROWS, replace=False)]
+    
+    mean, scale = load_scaler(timestamp)
+    return ((X - mean) / scale).astype(np.float32)
+
+
+def quantize_latest_model():
+    """Convert the latest model to int8 and save it next to the original"""
+    latest_model, timestamp = find_latest_model()
+    print(f"Quantizing {latest_model}")
+    
+    rows = load_calibration_rows(timestamp)
+    if len(rows) == 0:
+        print("⚠️  No signature data to calibrate with!")
+        return None
+    print(f"Calibrating on {len(rows)} signatures")
+    
+    def representative_dataset():
+        for row in rows:
+            yield [row[np.newaxis]]
+    
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(latest_model))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    
+    int8_path = os.path.splitext(latest_model)[0] + '_int8.tflite'
+    with open(int8_path, 'wb') as f:
+        f.write(converter.convert())
+    
+    print(f"💾 Int8 model saved to: {int8_path}")
+    return int8_path
+
+
+if __name__ == "__main__":
+    quantize_latest_model()
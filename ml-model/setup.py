@@ -0,0 +1,11 @@
+"""
+Builds the optional _points_ext Cython module used by collect_signature_data
+python setup.py build_ext --inplace
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='chickenscratch-ml-extensions',
+    ext_modules=cythonize('_points_ext.pyx'),
+)
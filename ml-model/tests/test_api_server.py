@@ -0,0 +1,89 @@
+import importlib
+import os
+import threading
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='module')
+def api_server(tmp_path_factory):
+    # Importing the server rebuilds the dashboard totals under data/
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('api_server'))
+    try:
+        yield importlib.import_module('api_server')
+    finally:
+        os.chdir(cwd)
+
+
+class _FakeVerifier:
+    """Scores each row as its sum and records the batch sizes it saw"""
+    
+    def __init__(self):
+        self.batch_sizes = []
+        self.gate = threading.Event()
+    
+    def predict_batch(self, X):
+        self.gate.wait()
+        self.batch_sizes.append(len(X))
+        return X.sum(axis=1)
+
+
+def test_batcher_resolves_futures_in_order(api_server):
+    verifier = _FakeVerifier()
+    batcher = api_server._VerifyBatcher(verifier, max_batch=4, window=0.05)
+    
+    # Hold the first batch so the rest queue up behind it
+    rows = [np.full(3, i, dtype=np.float32) for i in range(10)]
+    futures = [batcher.submit(row) for row in rows]
+    verifier.gate.set()
+    
+    assert [future.result(timeout=5) for future in futures] == [3 * i for i in range(10)]
+    assert sum(verifier.batch_sizes) == 10
+    assert max(verifier.batch_sizes) <= 4
+
+
+def test_batcher_fails_every_future_in_a_failed_batch(api_server):
+    class _Broken:
+        def predict_batch(self, X):
+            raise RuntimeError('model unavailable')
+    
+    batcher = api_server._VerifyBatcher(_Broken(), max_batch=4, window=0.05)
+    futures = [batcher.submit(np.zeros(3, dtype=np.float32)) for _ in range(3)]
+    
+    for future in futures:
+        with pytest.raises(RuntimeError, match='model unavailable'):
+            future.result(timeout=5)
+
+
+def test_batcher_survives_rows_of_different_shapes(api_server):
+    verifier = _FakeVerifier()
+    batcher = api_server._VerifyBatcher(verifier, max_batch=4, window=0.05)
+    
+    # The odd-shaped row can't be stacked with the others, failing its batch
+    futures = [batcher.submit(np.zeros(3, dtype=np.float32)), batcher.submit(np.zeros(5, dtype=np.float32))]
+    verifier.gate.set()
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    
+    # The worker is still running afterwards
+    assert batcher.submit(np.ones(3, dtype=np.float32)).result(timeout=5) == 3
+
+
+def test_verify_ml_times_out_with_500(api_server, monkeypatch):
+    class _Stuck:
+        def prepare_features(self, signature_data):
+            return np.zeros(3, dtype=np.float32), np.zeros(3)
+        
+        def predict_batch(self, X):
+            threading.Event().wait(1)
+            return X.sum(axis=1)
+    
+    monkeypatch.setattr(api_server, 'PREDICTION_TIMEOUT', 0.05)
+    monkeypatch.setattr(api_server, '_batcher', api_server._VerifyBatcher(_Stuck(), max_batch=4))
+    
+    response = api_server.app.test_client().post('/api/verify-ml', json={'signatureData': {}, 'userId': 'alice'})
+    assert response.status_code == 500
+    assert 'timed out' in response.get_json()['error']
@@ -0,0 +1,92 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from collect_signature_data import SignatureDataCollector
+from training_data import KEY_PATHS, flatten_features
+
+
+def _point_stroke(points, start=None, end=None):
+    stroke = {'points': [dict(zip(('x', 'y', 'time'), p)) for p in points]}
+    if start is not None:
+        stroke['startTime'] = start
+        stroke['endTime'] = end
+    return stroke
+
+
+SIGNATURES = {
+    'no strokes key': {},
+    'empty strokes': {'strokes': []},
+    'empty stroke': {'strokes': [{'points': []}]},
+    'timed points': {'strokes': [
+        _point_stroke([(0, 0, 0), (3, 4, 10), (6, 8, 25)], start=0, end=25),
+        _point_stroke([(10, 2, 40), (12, 5, 48)], start=40, end=48),
+    ]},
+    'missing times': {'strokes': [
+        _point_stroke([(0, 0), (3, 4), (6, 8)]),
+        _point_stroke([(1, 1, 5), (2, 2)]),
+    ]},
+    'single point': {'strokes': [_point_stroke([(5, 5, 0)], start=0, end=0)]},
+    'array strokes': {'strokes': [
+        {'xs': np.array([0.0, 1.0, 4.0]), 'ys': np.array([0.0, 2.0, 2.0]),
+         'ts': np.array([0.0, 8.0, 20.0]), 'startTime': 0, 'endTime': 20},
+        {'xs': [7, 9], 'ys': [1, 1], 'ts': [30, 35], 'startTime': 30, 'endTime': 35},
+    ]},
+}
+
+
+@pytest.fixture(scope='module')
+def collector(tmp_path_factory):
+    # The collector creates data/ in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('collector'))
+    try:
+        yield SignatureDataCollector()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.mark.parametrize('signature', SIGNATURES.values(), ids=SIGNATURES.keys())
+def test_process_signature_into_matches_process_signature(collector, signature):
+    out = np.full((2, len(KEY_PATHS)), np.nan)
+    collector.process_signature_into(signature, out, 1)
+    
+    expected = flatten_features(collector.process_signature(signature))
+    np.testing.assert_allclose(out[1], expected)
+    assert np.isnan(out[0]).all()
+
+
+def test_concurrent_consistency_rows_are_all_kept(collector):
+    features = {
+        'velocity_features': {'average_velocity': 2.0},
+        'basic_stats': {'stroke_count': 3},
+        'shape_features': {'area': 100.0},
+    }
+    
+    def add_rows():
+        for _ in range(500):
+            collector._add_consistency_row('concurrent', features)
+    
+    threads = [threading.Thread(target=add_rows) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert collector.analyze_consistency('concurrent')['sample_count'] == 4000
+
+
+def test_collectors_in_one_second_save_to_distinct_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second = SignatureDataCollector(), SignatureDataCollector()
+    assert not (tmp_path / 'data').exists()
+    
+    # Same stamp, as for two collectors created in the same second
+    second._session_stamp = first._session_stamp
+    signature = SIGNATURES['timed points']
+    for collector in (first, second, first):
+        collector.save_signature(signature, 'alice')
+    
+    assert len(list((tmp_path / 'data').glob('signature_data_alice_*.json'))) == 3
@@ -0,0 +1,53 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def ml_api_server():
+    # The server loads the committed model from models/ at import
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        module = importlib.import_module('ml_api_server')
+    finally:
+        os.chdir(cwd)
+    if module.model is None:
+        pytest.skip('no trained model to score with')
+    return module
+
+
+@pytest.fixture
+def client(ml_api_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(ml_api_server, 'ENROLLED_DIR', str(tmp_path / 'enrolled'))
+    ml_api_server._enrolled.clear()
+    return ml_api_server.app.test_client()
+
+
+def _metrics(ml_api_server, scale):
+    return {name: (i + 1) * scale for i, name in enumerate(ml_api_server.feature_names)}
+
+
+def test_enrollment_is_read_back_from_disk(ml_api_server, client):
+    stored, current = _metrics(ml_api_server, 2.0), _metrics(ml_api_server, 2.5)
+    expected = client.post('/api/predict', json={'stored_features': stored, 'current_features': current}).get_json()
+    
+    assert client.post('/api/enroll', json={'username': 'alice', 'features': stored}).get_json()['success']
+    
+    # A fresh cache stands in for another worker process or a restart
+    ml_api_server._enrolled.clear()
+    assert client.post('/api/predict', json={'username': 'alice', 'current_features': current}).get_json() == expected
+    
+    response = client.post('/api/predict', json={'username': 'bob', 'current_features': current})
+    assert response.status_code == 400
+
+
+def test_enrolled_cache_is_capped(ml_api_server, client, monkeypatch):
+    monkeypatch.setattr(ml_api_server, 'ENROLLED_CACHE_SIZE', 3)
+    current = _metrics(ml_api_server, 1.0)
+    for i in range(5):
+        client.post('/api/enroll', json={'username': f'user{i}', 'features': _metrics(ml_api_server, i + 1.0)})
+        client.post('/api/predict', json={'username': f'user{i}', 'current_features': current})
+    
+    assert list(ml_api_server._enrolled) == ['user2', 'user3', 'user4']
@@ -0,0 +1,83 @@
+import numpy as np
+import orjson
+import pytest
+
+import training_data
+from training_data import (
+    FEATURE_GROUPS, FEATURE_NAMES, SHARD_PREFIX, SHARD_SUFFIX,
+    flatten_features, load_feature_matrix, load_feature_shards
+)
+
+
+def _write_signatures(directory, n):
+    """Signature files with some features missing or None, as saved files can be"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(n):
+        features = {group: {key: float(rng.uniform(0, 100)) for key in keys}
+                    for group, keys in FEATURE_GROUPS}
+        features['basic_stats']['stroke_count'] = None
+        if i % 3 == 0:
+            del features['shape_features']
+        
+        path = directory / f'signature_data_user{i % 3}_{i:06d}.json'
+        path.write_bytes(orjson.dumps({
+            'user_id': f'user{i % 3}',
+            'type': 'forgery' if i % 4 == 0 else 'genuine',
+            'features': features,
+        }))
+        paths.append(str(path))
+    return paths
+
+
+def test_load_feature_shards_skips_truncated_line(tmp_path):
+    rows = [[float(i + j) for j in range(len(FEATURE_NAMES))] for i in range(3)]
+    lines = [
+        orjson.dumps([f'signature_data_user{i}_{i:06d}.json', f'user{i}', i % 2, row])
+        for i, row in enumerate(rows)
+    ]
+    # The last save was interrupted halfway through its line
+    (tmp_path / f'{SHARD_PREFIX}session{SHARD_SUFFIX}').write_bytes(
+        lines[0] + b'\n' + lines[1] + b'\n' + lines[2][:len(lines[2]) // 2]
+    )
+    
+    data_files = [str(tmp_path / f'signature_data_user{i}_{i:06d}.json') for i in range(3)]
+    (X, labels, users), remaining = load_feature_shards(data_files, directory=str(tmp_path))
+    
+    assert X.dtype == np.float32
+    np.testing.assert_array_equal(X, np.array(rows[:2], dtype=np.float32))
+    np.testing.assert_array_equal(labels, [0, 1])
+    assert users == ['user0', 'user1']
+    assert remaining == data_files[2:]
+
+
+def test_load_feature_shards_without_data_directory(tmp_path):
+    data_files = [str(tmp_path / 'missing' / 'signature_data_user0_000001.json')]
+    (X, labels, users), remaining = load_feature_shards(data_files, directory=str(tmp_path / 'missing'))
+    
+    assert X.shape == (0, len(FEATURE_NAMES))
+    assert len(labels) == 0 and users == []
+    assert remaining == data_files
+
+
+@pytest.mark.parametrize('max_workers, pool_min_files', [(1, 5000), (2, 5000), (2, 0)],
+                         ids=['serial', 'thread pool', 'process pool'])
+def test_load_feature_matrix_matches_serial_flattening(tmp_path, monkeypatch, max_workers, pool_min_files):
+    data_files = _write_signatures(tmp_path, 12)
+    monkeypatch.setattr(training_data, 'PROCESS_POOL_MIN_FILES', pool_min_files)
+    
+    X, labels, users = load_feature_matrix(data_files, max_workers=max_workers)
+    
+    expected = []
+    for path in data_files:
+        with open(path, 'rb') as f:
+            expected.append(flatten_features(orjson.loads(f.read())['features']))
+    np.testing.assert_array_equal(X, np.array(expected, dtype=np.float32))
+    np.testing.assert_array_equal(labels, [0 if i % 4 == 0 else 1 for i in range(12)])
+    assert users == [f'user{i % 3}' for i in range(12)]
+
+
+def test_load_feature_matrix_empty():
+    X, labels, users = load_feature_matrix([])
+    assert X.shape == (0, len(FEATURE_NAMES))
+    assert len(labels) == 0 and users == []
@@ -1,12 +1,11 @@
 import numpy as np
+import orjson
 import tensorflow as tf
 from tensorflow import keras
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-import json
 import os
-import glob
 from datetime import datetime
+from training_data import FEATURE_NAMES, list_data_files, load_feature_matrix, load_feature_shards
 
 class SignatureMLModel:
     """
@@ -16,7 +15,9 @@ class SignatureMLModel:
     
     def __init__(self):
         self.model = None
-        self.scaler = StandardScaler()  # This normalizes our data
+        # Mean and scale used to normalize our data (same as a StandardScaler)
+        self.scaler_mean = None
+        self.scaler_scale = None
         self.feature_names = []
         
     def load_training_data(self):
@@ -25,92 +26,23 @@ class SignatureMLModel:
         """
         print("Loading signature data...")
         
-        all_features = []
-        all_labels = []
-        all_users = []
-        
         # Find all JSON files in the data directory
-        data_files = glob.glob('data/signature_data_*.json')
+        data_files = list_data_files()
         
         print(f"Found {len(data_files)} signature files")
         
-        for file_path in data_files:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                
-                # Extract features into a flat list of numbers
-                features = self._flatten_features(data['features'])
-                all_features.append(features)
-                
-                # Label: 1 for genuine, 0 for forgery
-                label = 1 if data['type'] == 'genuine' else 0
-                all_labels.append(label)
-                
-                # Keep track of which user this is
-                all_users.append(data['user_id'])
-        
-        return np.array(all_features), np.array(all_labels), all_users
-    
-    def _flatten_features(self, features_dict):
-        """
-        Convert the nested feature dictionary into a flat list of numbers
-        This is like turning a complex description into a series of measurements
-        """
-        flat_features = []
-        
-        # Basic stats
-        basic = features_dict.get('basic_stats', {})
-        flat_features.extend([
-            basic.get('stroke_count', 0),
-            basic.get('total_points', 0),
-            basic.get('total_duration_ms', 0),
-            basic.get('average_points_per_stroke', 0)
-        ])
-        
-        # Velocity features
-        velocity = features_dict.get('velocity_features', {})
-        flat_features.extend([
-            velocity.get('average_velocity', 0),
-            velocity.get('max_velocity', 0),
-            velocity.get('min_velocity', 0),
-            velocity.get('velocity_std', 0)
-        ])
-        
-        # Shape features
-        shape = features_dict.get('shape_features', {})
-        flat_features.extend([
-            shape.get('width', 0),
-            shape.get('height', 0),
-            shape.get('area', 0),
-            shape.get('aspect_ratio', 0),
-            shape.get('center_x', 0),
-            shape.get('center_y', 0)
-        ])
-        
-        # Stroke features
-        stroke = features_dict.get('stroke_features', {})
-        flat_features.extend([
-            stroke.get('average_stroke_length', 0),
-            stroke.get('total_length', 0),
-            stroke.get('length_variation', 0),
-            stroke.get('average_stroke_duration', 0),
-            stroke.get('duration_variation', 0)
-        ])
+        # Use the compact feature shards where they cover a file, and parse
+        # the rest across CPU cores into one float32 feature matrix
+        (X_shard, shard_labels, shard_users), remaining = load_feature_shards(data_files)
+        X, all_labels, all_users = load_feature_matrix(remaining)
+        X = np.concatenate((X_shard, X))
+        all_labels = np.concatenate((shard_labels, all_labels))
+        all_users = shard_users + all_users
         
         # Store feature names for later reference
-        if not self.feature_names:
-            self.feature_names = [
-                'stroke_count', 'total_points', 'total_duration_ms', 'avg_points_per_stroke',
-                'avg_velocity', 'max_velocity', 'min_velocity', 'velocity_std',
-                'width', 'height', 'area', 'aspect_ratio', 'center_x', 'center_y',
-                'avg_stroke_length', 'total_length', 'length_variation',
-                'avg_stroke_duration', 'duration_variation'
-            ]
-        
-        # Replace any None values with 0
-        flat_features = [0 if x is None else x for x in flat_features]
-        
-        return flat_features
+        self.feature_names = list(FEATURE_NAMES)
+        
+        return X, all_labels, all_users
     
     def create_model(self, input_shape):
         """
@@ -163,7 +95,16 @@ class SignatureMLModel:
         print(f"Unique users: {len(set(users))}")
         
         # Normalize the features
-        X_scaled = self.scaler.fit_transform(X)
+        # Done in place on the float32 matrix instead of StandardScaler.fit_transform,
+        # which validates and copies it twice; zero-variance columns keep scale 1
+        mean = X.mean(axis=0, dtype=np.float64)
+        std = X.std(axis=0, dtype=np.float64)
+        std[std == 0] = 1.0
+        np.subtract(X, mean, out=X, casting='same_kind')
+        np.divide(X, std, out=X, casting='same_kind')
+        X_scaled = X
+        self.scaler_mean = mean
+        self.scaler_scale = std
         
         # Split into training and testing sets
         X_train, X_test, y_train, y_test = train_test_split(
@@ -210,23 +151,27 @@ class SignatureMLModel:
         # Save with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save the neural network
-        model_path = f'models/signature_model_{timestamp}.h5'
-        self.model.save(model_path)
-        print(f"\n💾 Model saved to: {model_path}")
+        # The model file goes last: the verifier picks the newest model and
+        # expects its scaler and feature names to be there already
+        # Save feature names for reference
+        feature_path = f'models/features_{timestamp}.json'
+        with open(feature_path, 'wb') as f:
+            f.write(orjson.dumps(self.feature_names, option=orjson.OPT_INDENT_2))
+        print(f"Feature names saved to: {feature_path}")
         
         # Save the scaler (we need this to normalize new signatures)
-        import pickle
-        scaler_path = f'models/scaler_{timestamp}.pkl'
-        with open(scaler_path, 'wb') as f:
-            pickle.dump(self.scaler, f)
+        # Only mean and scale are needed, so store them as plain arrays
+        scaler_path = f'models/scaler_{timestamp}.npz'
+        np.savez(scaler_path, mean=self.scaler_mean, scale=self.scaler_scale)
         print(f"Scaler saved to: {scaler_path}")
         
-        # Save feature names for reference
-        feature_path = f'models/features_{timestamp}.json'
-        with open(feature_path, 'w') as f:
-            json.dump(self.feature_names, f)
-        print(f"Feature names saved to: {feature_path}")
+        # Save the neural network (native Keras zip format) under a name the
+        # verifier ignores, then move it into place in one step
+        model_path = f'models/signature_model_{timestamp}.keras'
+        tmp_path = f'models/signature_model_{timestamp}.tmp.keras'
+        self.model.save(tmp_path)
+        os.replace(tmp_path, model_path)
+        print(f"\n💾 Model saved to: {model_path}")
     
     def analyze_feature_importance(self, X, y):
         """
@@ -237,7 +182,9 @@ class SignatureMLModel:
         print("\n🔍 Analyzing feature importance...")
         
         # Use a Random Forest to get feature importance
-        rf = RandomForestClassifier(n_estimators=100, random_state=42)
+        # float32 input halves the memory touched during split search
+        X = np.asarray(X, dtype=np.float32)
+        rf = RandomForestClassifier(n_estimators=100, max_features='sqrt', random_state=42, n_jobs=-1)
         rf.fit(X, y)
         
         # Get feature importance
@@ -4,22 +4,46 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
 import json
+import joblib
 import os
-import glob
 import pickle
+import sys
 from datetime import datetime
+from training_data import FEATURE_NAMES, list_data_files, flatten_features, load_feature_matrix, load_feature_shards
+
+try:
+    import lightgbm as lgb
+except ImportError:  # lightgbm is optional, only needed for --lightgbm
+    lgb = None
 
 class SignatureMLModel:
     """
     ML model for signature authentication using Random Forest
     """
     
-    def __init__(self):
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
+    def __init__(self, use_lightgbm=False):
+        self.use_lightgbm = use_lightgbm
+        if use_lightgbm:
+            if lgb is None:
+                raise ImportError("lightgbm is not installed (pip install lightgbm)")
+            # Gradient-boosted trees; the saved booster predicts in compiled C
+            # code instead of walking sklearn's tree objects
+            self.model = lgb.LGBMClassifier(
+                n_estimators=100,
+                max_depth=10,
+                objective='binary',
+                random_state=42,
+                verbose=-1
+            )
+        else:
+            # 30 trees is past the point of diminishing returns for 19
+            # features, and keeps the pickled model small and fast to score
+            self.model = RandomForestClassifier(
+                n_estimators=30,
+                max_depth=10,
+                random_state=42,
+                n_jobs=-1
+            )
         self.scaler = StandardScaler()
         self.feature_names = []
         
@@ -27,89 +51,29 @@ class SignatureMLModel:
         """Load all signature data from exported JSON files"""
         print("Loading signature data...")
         
-        all_features = []
-        all_labels = []
-        all_users = []
-        
         # Find all JSON files in the data directory
-        data_files = glob.glob('data/signature_data_*.json')
+        data_files = list_data_files()
         
         print(f"Found {len(data_files)} signature files")
         
-        for file_path in data_files:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                
-                # Extract features into a flat list of numbers
-                features = self._flatten_features(data['features'])
-                all_features.append(features)
-                
-                # Label: 1 for genuine, 0 for forgery
-                label = 1 if data['type'] == 'genuine' else 0
-                all_labels.append(label)
-                
-                # Keep track of which user this is
-                all_users.append(data['user_id'])
-        
-        return np.array(all_features), np.array(all_labels), all_users
+        # Files covered by the compact feature shards skip JSON parsing
+        (shard_features, shard_labels, shard_users), remaining = load_feature_shards(data_files)
+        
+        # Parse the rest into float32 rows the same way train_model.py does;
+        # float32 is plenty for counts, milliseconds and pixels, and it's
+        # what the trees compare against anyway
+        all_features, all_labels, all_users = load_feature_matrix(remaining)
+        
+        self.feature_names = list(FEATURE_NAMES)
+        return (
+            np.concatenate((shard_features, all_features)),
+            np.concatenate((shard_labels, all_labels)),
+            shard_users + all_users
+        )
     
     def _flatten_features(self, features_dict):
-        """Convert nested feature dictionary into flat list"""
-        flat_features = []
-        
-        # Basic stats
-        basic = features_dict.get('basic_stats', {})
-        flat_features.extend([
-            basic.get('stroke_count', 0),
-            basic.get('total_points', 0),
-            basic.get('total_duration_ms', 0),
-            basic.get('average_points_per_stroke', 0)
-        ])
-        
-        # Velocity features
-        velocity = features_dict.get('velocity_features', {})
-        flat_features.extend([
-            velocity.get('average_velocity', 0),
-            velocity.get('max_velocity', 0),
-            velocity.get('min_velocity', 0),
-            velocity.get('velocity_std', 0)
-        ])
-        
-        # Shape features
-        shape = features_dict.get('shape_features', {})
-        flat_features.extend([
-            shape.get('width', 0),
-            shape.get('height', 0),
-            shape.get('area', 0),
-            shape.get('aspect_ratio', 0),
-            shape.get('center_x', 0),
-            shape.get('center_y', 0)
-        ])
-        
-        # Stroke features
-        stroke = features_dict.get('stroke_features', {})
-        flat_features.extend([
-            stroke.get('average_stroke_length', 0),
-            stroke.get('total_length', 0),
-            stroke.get('length_variation', 0),
-            stroke.get('average_stroke_duration', 0),
-            stroke.get('duration_variation', 0)
-        ])
-        
-        # Store feature names
-        if not self.feature_names:
-            self.feature_names = [
-                'stroke_count', 'total_points', 'total_duration_ms', 'avg_points_per_stroke',
-                'avg_velocity', 'max_velocity', 'min_velocity', 'velocity_std',
-                'width', 'height', 'area', 'aspect_ratio', 'center_x', 'center_y',
-                'avg_stroke_length', 'total_length', 'length_variation',
-                'avg_stroke_duration', 'duration_variation'
-            ]
-        
-        # Replace None with 0
-        flat_features = [0 if x is None else x for x in flat_features]
-        
-        return flat_features
+        """Convert nested feature dictionary into a flat row of FEATURE_NAMES values"""
+        return flatten_features(features_dict)
     
     def train(self):
         """Train the model on signature data"""
@@ -138,9 +102,14 @@ class SignatureMLModel:
         print(f"Testing samples: {len(X_test)}")
         
         # Train the model
-        print("\n🧠 Training Random Forest model...")
+        print(f"\n🧠 Training {'LightGBM' if self.use_lightgbm else 'Random Forest'} model...")
         self.model.fit(X_train, y_train)
         
+        # Fit on all cores, but score the API's one or few rows on a single
+        # thread; fanning those out through joblib costs more than it saves
+        if not self.use_lightgbm:
+            self.model.n_jobs = None
+        
         # Evaluate
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
@@ -169,16 +138,23 @@ class SignatureMLModel:
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save the model
-        model_path = f'models/signature_model_{timestamp}.pkl'
-        with open(model_path, 'wb') as f:
-            pickle.dump(self.model, f)
+        # Save the model; LightGBM boosters use their own text format
+        if self.use_lightgbm:
+            model_path = f'models/signature_model_{timestamp}.txt'
+            self.model.booster_.save_model(model_path)
+        else:
+            # joblib stores the trees' arrays uncompressed and aligned, so
+            # the API can memory-map them when it loads the model
+            model_path = f'models/signature_model_{timestamp}.joblib'
+            joblib.dump(self.model, model_path, protocol=pickle.HIGHEST_PROTOCOL)
         print(f"\n💾 Model saved to: {model_path}")
         
-        # Save the scaler
-        scaler_path = f'models/scaler_{timestamp}.pkl'
-        with open(scaler_path, 'wb') as f:
-            pickle.dump(self.scaler, f)
+        # Save the scaler, with its statistics in float32 to match the features
+        self.scaler.mean_ = self.scaler.mean_.astype(np.float32)
+        self.scaler.scale_ = self.scaler.scale_.astype(np.float32)
+        self.scaler.var_ = self.scaler.var_.astype(np.float32)
+        scaler_path = f'models/scaler_{timestamp}.joblib'
+        joblib.dump(self.scaler, scaler_path, protocol=pickle.HIGHEST_PROTOCOL)
         print(f"Scaler saved to: {scaler_path}")
         
         # Save feature names
@@ -192,6 +168,7 @@ class SignatureMLModel:
         with open(latest_path, 'w') as f:
             json.dump({
                 'model_path': model_path,
+                'model_type': 'lightgbm' if self.use_lightgbm else 'random_forest',
                 'scaler_path': scaler_path,
                 'feature_path': feature_path,
                 'timestamp': timestamp,
@@ -203,7 +180,8 @@ if __name__ == "__main__":
     print("🚀 Signature ML Model Training (scikit-learn)")
     print("="*50)
     
-    trainer = SignatureMLModel()
+    # Pass --lightgbm to train a LightGBM model instead of the Random Forest
+    trainer = SignatureMLModel(use_lightgbm='--lightgbm' in sys.argv)
     accuracy, model = trainer.train()
     
     if model:
@@ -1,10 +1,316 @@
-import tensorflow as tf
 import numpy as np
+import orjson
+from scipy.special import expit
 import pickle
-import json
 import os
+import re
 import glob
-from collect_signature_data import SignatureDataCollector
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from collect_signature_data import SignatureDataCollector, load_signature_file
+from training_data import FEATURE_NAMES, KEY_PATHS, flatten_features_into
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to plain NumPy
+    njit = None
+
+# Most rows per forward pass; the TFLite interpreter is sized for exactly
+# this many and smaller batches are zero-padded up to it
+MAX_BATCH = 32
+
+# Loaded models keyed by model path, shared by every SignatureVerifier
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+_CACHED_ATTRS = ('model', 'scaler_mean', 'scaler_scale', 'scaler_inv_scale', 'feature_names',
+                 '_dense', '_predict', '_tflite')
+
+# Saved Keras models, e.g. 'signature_model_20250718_201827.keras'
+_MODEL_FILE = re.compile(r'signature_model_(\d{8}_\d{6})\.(?:keras|h5)')
+
+# NumPy versions of the Keras activations a Dense layer can use here
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': expit,
+    'tanh': np.tanh,
+}
+
+# The same activations as numbered for _dense_kernel
+_ACTIVATION_CODES = {'linear': 0, 'relu': 1, 'sigmoid': 2, 'tanh': 3}
+
+# Batches up to this many rows use the compiled forward pass
+KERNEL_MAX_ROWS = 8
+
+# Largest difference from Keras allowed for the NumPy forward pass
+FORWARD_TOLERANCE = 1e-5
+
+# Per-thread rows reused by prepare_features
+_scratch = threading.local()
+
+# Feature rows of recently seen signatures, keyed by a digest of their JSON,
+# so scoring the same signature again skips feature extraction
+FEATURE_CACHE_SIZE = 4096
+_FEATURE_CACHE = OrderedDict()
+_FEATURE_CACHE_LOCK = threading.Lock()
+
+# Timed runs per TFLite model when choosing between the float and int8 copies
+BENCH_RUNS = 50
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _standardize(x, mean, inv_scale, out):
+        """out = (x - mean) * inv_scale, element by element"""
+        for i in range(x.shape[0]):
+            out[i] = (x[i] - mean[i]) * inv_scale[i]
+else:
+    def _standardize(x, mean, inv_scale, out):
+        """out = (x - mean) * inv_scale, element by element"""
+        np.subtract(x, mean, out=out)
+        np.multiply(out, inv_scale, out=out)
+
+
+def _tensorflow():
+    """
+    Import TensorFlow on first use
+    It takes seconds and hundreds of MB to load, and only loading and
+    running the model need it, not the feature helpers in this module
+    """
+    # Keep TensorFlow's C++ info and warning banners out of the logs
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+    return tf
+
+
+def _scratch_rows(n_features):
+    """This thread's (flat (1, n), scaled (n,)) float32 feature rows"""
+    rows = getattr(_scratch, 'rows', None)
+    if rows is None or rows[1].shape[0] != n_features:
+        rows = (np.empty((1, n_features), dtype=np.float32), np.empty(n_features, dtype=np.float32))
+        _scratch.rows = rows
+    return rows
+
+
+def find_latest_model():
+    """
+    Find the most recently trained model
+    Returns: (model path, timestamp from its file name)
+    """
+    
+    # Find the latest model file (.keras, or .h5 from older training runs)
+    try:
+        with os.scandir('models') as entries:
+            matches = [match for match in map(_MODEL_FILE.fullmatch, (entry.name for entry in entries)) if match]
+    except FileNotFoundError:
+        matches = []
+    
+    latest = max(matches, key=lambda match: match.string, default=None)
+    if latest is None:
+        raise Exception("No trained model found! Please run train_model.py first.")
+    
+    return os.path.join('models', latest.string), latest.group(1)
+
+
+def load_scaler(timestamp):
+    """
+    Load the mean and scale of the scaler saved with a model
+    Older models pickled the whole StandardScaler; migrate_scalers.py
+    converts those to .npz so loading skips unpickling
+    """
+    scaler_path = f'models/scaler_{timestamp}.npz'
+    if os.path.exists(scaler_path):
+        with np.load(scaler_path) as scaler:
+            return scaler['mean'], scaler['scale']
+    
+    with open(f'models/scaler_{timestamp}.pkl', 'rb') as f:
+        scaler = pickle.load(f)
+    return scaler.mean_, scaler.scale_
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _dense_kernel(x, weights, biases, sizes, activations, out):
+        """
+        Forward pass of a packed Dense network, one row at a time
+        Each layer's activations stay in two small scratch rows instead of
+        being written out as a full matrix between layers
+        """
+        width = sizes.max()
+        for r in range(x.shape[0]):
+            a = np.empty(width, np.float32)
+            h = np.empty(width, np.float32)
+            a[:sizes[0]] = x[r]
+            w_off = 0
+            b_off = 0
+            for layer in range(activations.shape[0]):
+                n_in = sizes[layer]
+                n_out = sizes[layer + 1]
+                activation = activations[layer]
+                for j in range(n_out):
+                    acc = biases[b_off + j]
+                    row = w_off + j * n_in
+                    for i in range(n_in):
+                        acc += a[i] * weights[row + i]
+                    if activation == 1:
+                        acc = max(acc, np.float32(0))
+                    elif activation == 2:
+                        acc = np.float32(1) / (np.float32(1) + np.exp(-acc))
+                    elif activation == 3:
+                        acc = np.tanh(acc)
+                    h[j] = acc
+                w_off += n_in * n_out
+                b_off += n_out
+                a, h = h, a
+            out[r] = a[0]
+else:
+    _dense_kernel = None  # numba is optional, NumPy matmuls are used instead
+
+
+def _extract_dense_layers(model):
+    """
+    (weights, bias, activation name) of each layer of a plain Dense network,
+    or None if the model has layers the NumPy forward pass can't run
+    """
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ('InputLayer', 'Dropout'):
+            continue  # Dropout does nothing at inference time
+        if kind != 'Dense' or not layer.use_bias:
+            return None
+        activation = layer.get_config()['activation']
+        if activation not in _ACTIVATIONS:
+            return None
+        weights, bias = layer.get_weights()
+        layers.append((weights.astype(np.float32), bias.astype(np.float32), activation))
+    return layers or None
+
+
+class _DenseNetwork:
+    """
+    The verifier MLP without TensorFlow
+    Small batches go through the compiled _dense_kernel, larger ones through
+    NumPy's BLAS matmuls, which win once there are more than a few rows
+    """
+    
+    def __init__(self, layers):
+        self.layers = [(weights, bias, _ACTIVATIONS[name]) for weights, bias, name in layers]
+        
+        # The same weights packed for the kernel: each layer's matrix
+        # transposed so one output's inputs are contiguous
+        self.weights = np.concatenate([weights.T.ravel() for weights, _, _ in layers])
+        self.biases = np.concatenate([bias for _, bias, _ in layers])
+        self.sizes = np.array([layers[0][0].shape[0]] + [bias.shape[0] for _, bias, _ in layers], dtype=np.int64)
+        self.activations = np.array([_ACTIVATION_CODES[name] for _, _, name in layers], dtype=np.int64)
+    
+    def predict(self, x, use_kernel=None):
+        """Genuine-probability for each standardized float32 row"""
+        if use_kernel is None:
+            use_kernel = _dense_kernel is not None and x.shape[0] <= KERNEL_MAX_ROWS
+        
+        if use_kernel:
+            out = np.empty(x.shape[0], dtype=np.float32)
+            _dense_kernel(x, self.weights, self.biases, self.sizes, self.activations, out)
+            return out
+        
+        for weights, bias, activation in self.layers:
+            x = activation(x @ weights + bias)
+        return x[:, 0]
+
+
+class _TFLiteModel:
+    """
+    A TFLite interpreter sized for MAX_BATCH rows, plus a second one that
+    is resized to fit whole test sets and scores them in a single invoke
+    Int8 models get their input quantized and their output dequantized here
+    """
+    
+    def __init__(self, model_path, n_features, num_threads=1):
+        self.path = model_path
+        self.num_threads = num_threads
+        self.interpreter = self._open()
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.interpreter.resize_tensor_input(input_details['index'], [MAX_BATCH, n_features])
+        self.interpreter.allocate_tensors()
+        
+        self.input_index = input_details['index']
+        self.output_index = output_details['index']
+        self.quantized = input_details['dtype'] == np.int8
+        self.input_scale, self.input_zero_point = input_details['quantization']
+        self.output_scale, self.output_zero_point = output_details['quantization']
+        # The interpreter is shared between verifiers and isn't thread-safe
+        self.lock = threading.Lock()
+        
+        # Opened on the first large batch; resized whenever the row count changes
+        self.bulk_interpreter = None
+        self.bulk_rows = 0
+        self.bulk_lock = threading.Lock()
+    
+    def _open(self):
+        """A new interpreter for this model"""
+        # XNNPACK (float) and ruy (int8) kernels are on by default in the
+        # interpreter; num_threads sets how many cores they may use
+        return _tensorflow().lite.Interpreter(model_path=self.path, num_threads=self.num_threads)
+    
+    def predict(self, batch):
+        """Genuine-probability for each row of a float32 (MAX_BATCH, F) batch"""
+        with self.lock:
+            return self._invoke(self.interpreter, batch)
+    
+    def predict_many(self, X):
+        """Genuine-probability for each row of a float32 (N, F) matrix, in one invoke"""
+        with self.bulk_lock:
+            if self.bulk_interpreter is None:
+                self.bulk_interpreter = self._open()
+            if self.bulk_rows != X.shape[0]:
+                self.bulk_interpreter.resize_tensor_input(self.input_index, list(X.shape))
+                self.bulk_interpreter.allocate_tensors()
+                self.bulk_rows = X.shape[0]
+            return self._invoke(self.bulk_interpreter, X)
+    
+    def _invoke(self, interpreter, batch):
+        """Run one batch through interpreter; the caller holds its lock"""
+        if self.quantized:
+            batch = np.round(batch / self.input_scale + self.input_zero_point)
+            batch = np.clip(batch, -128, 127).astype(np.int8)
+        
+        interpreter.set_tensor(self.input_index, batch)
+        interpreter.invoke()
+        output = interpreter.get_tensor(self.output_index)
+        
+        if self.quantized:
+            output = (output.astype(np.float32) - self.output_zero_point) * self.output_scale
+        return output[:, 0]
+    
+    def benchmark(self, n_features):
+        """Best wall time of one full-batch prediction, in seconds"""
+        batch = np.zeros((MAX_BATCH, n_features), dtype=np.float32)
+        self.predict(batch)
+        best = float('inf')
+        for _ in range(BENCH_RUNS):
+            start = time.perf_counter()
+            self.predict(batch)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+
+def _select_runtime(candidates, n_features):
+    """
+    Time each interpreter on a full batch and keep the fastest
+    Tiny models often run slower across several threads, and int8 kernels
+    aren't faster on every CPU, so this is measured rather than assumed
+    """
+    timings = [(runtime.benchmark(n_features), i) for i, runtime in enumerate(candidates)]
+    best_time, best = min(timings)
+    runtime = candidates[best]
+    print(f"Running inference with {runtime.path} on {runtime.num_threads} thread(s) "
+          f"({best_time * 1e6:.0f}µs per batch)")
+    return runtime
+
 
 class SignatureVerifier:
     """
@@ -13,142 +319,323 @@ class SignatureVerifier:
     
     def __init__(self):
         self.model = None
-        self.scaler = None
+        self.scaler_mean = None
+        self.scaler_scale = None
+        self.scaler_inv_scale = None
         self.feature_names = None
+        self._predict = None
+        self._dense = None
+        self._tflite = None
         self.collector = SignatureDataCollector()
         self.load_latest_model()
     
     def load_latest_model(self):
         """Load the most recently trained model"""
         
-        # Find the latest model file
-        model_files = glob.glob('models/signature_model_*.h5')
-        if not model_files:
-            raise Exception("No trained model found! Please run train_model.py first.")
+        latest_model, timestamp = find_latest_model()
         
-        latest_model = sorted(model_files)[-1]
-        # Extract timestamp from filename like 'models/signature_model_20250718_201827.h5'
-        timestamp = '_'.join(latest_model.split('_')[-2:])[:-3]  # Remove .h5
+        # Reuse the model if another verifier already loaded this file
+        with _MODEL_CACHE_LOCK:
+            cached = _MODEL_CACHE.get(latest_model)
+            if cached is None:
+                self._load_model_files(latest_model, timestamp)
+                _MODEL_CACHE[latest_model] = tuple(getattr(self, name) for name in _CACHED_ATTRS)
+            else:
+                for name, value in zip(_CACHED_ATTRS, cached):
+                    setattr(self, name, value)
+    
+    def _load_model_files(self, latest_model, timestamp):
+        """Load the model, scaler and feature names saved under timestamp"""
         
         print(f"Loading model from {latest_model}")
+        tf = _tensorflow()
         
         # Load the model
         self.model = tf.keras.models.load_model(latest_model)
         
-        # Load the scaler
-        scaler_path = f'models/scaler_{timestamp}.pkl'
-        with open(scaler_path, 'rb') as f:
-            self.scaler = pickle.load(f)
+        # Load the scaler's mean and scale
+        self.scaler_mean, self.scaler_scale = load_scaler(timestamp)
+        
+        # Baked into float32 arrays for the _standardize kernel, with the
+        # division folded into a multiply by 1/scale; the warm-up call compiles
+        # it (or loads it from numba's cache) before any request
+        self.scaler_mean = np.ascontiguousarray(self.scaler_mean, dtype=np.float32)
+        self.scaler_scale = np.ascontiguousarray(self.scaler_scale, dtype=np.float32)
+        self.scaler_inv_scale = (1.0 / self.scaler_scale).astype(np.float32)
+        _standardize(self.scaler_mean, self.scaler_mean, self.scaler_inv_scale, np.empty_like(self.scaler_mean))
         
         # Load feature names
         features_path = f'models/features_{timestamp}.json'
-        with open(features_path, 'r') as f:
-            self.feature_names = json.load(f)
+        with open(features_path, 'rb') as f:
+            self.feature_names = orjson.loads(f.read())
+        
+        # Catch a model saved with a different feature layout now rather
+        # than on the first verification
+        n_features = self.scaler_mean.shape[0]
+        if len(self.feature_names) != n_features:
+            raise Exception(f"{features_path} lists {len(self.feature_names)} features "
+                            f"but the scaler has {n_features}")
+        if tuple(self.feature_names[:len(FEATURE_NAMES)]) != FEATURE_NAMES[:len(self.feature_names)]:
+            # Rows are built in FEATURE_NAMES order, so any drift would feed
+            # the model the wrong columns without an error
+            raise Exception(f"Feature names in {features_path} don't match the collector's order")
+        
+        # A small Dense network runs fastest as a few NumPy matmuls; failing
+        # that, a TFLite copy of the model still skips Keras dispatch entirely
+        self._dense = self._load_dense_network(n_features)
+        if self._dense is None:
+            self._tflite = self._load_tflite(latest_model, n_features)
+        
+        if self._dense is None and self._tflite is None:
+            # Trace the forward pass once as an XLA-compiled graph, so requests
+            # skip Keras' predict() setup on every call. The batch dimension is
+            # left open so the graph is never retraced; XLA caches one compiled
+            # kernel per batch size, of which there are at most MAX_BATCH
+            self._predict = tf.function(
+                lambda x: self.model(x, training=False),
+                jit_compile=True,
+                input_signature=[tf.TensorSpec([None, n_features], tf.float32)]
+            )
+            self._predict(np.zeros((1, n_features), dtype=np.float32))
         
         print("✅ Model loaded successfully!")
     
+    def _load_dense_network(self, n_features):
+        """
+        Pull the Dense weights out of the Keras model for a NumPy forward pass
+        Both of its code paths are checked against Keras on a probe batch (which
+        also compiles the kernel) and it's only used if they agree
+        """
+        layers = _extract_dense_layers(self.model)
+        if layers is None:
+            return None
+        network = _DenseNetwork(layers)
+        
+        probe = np.random.default_rng(0).standard_normal((MAX_BATCH, n_features)).astype(np.float32)
+        expected = np.asarray(self.model(probe, training=False))[:, 0]
+        error = np.max(np.abs(network.predict(probe, use_kernel=False) - expected))
+        if _dense_kernel is not None:
+            error = max(error, np.max(np.abs(network.predict(probe, use_kernel=True) - expected)))
+        if not error <= FORWARD_TOLERANCE:
+            print(f"NumPy forward pass differs from Keras by {error:.2e}, not using it")
+            return None
+        
+        print("Running inference with NumPy")
+        return network
+    
+    def _load_tflite(self, model_path, n_features):
+        """
+        Open (converting first if needed) the TFLite version of the model
+        An int8 copy made by quantize_model.py, and running on every core,
+        are tried as well and the fastest combination on this machine is used
+        Returns None if the model can't be converted, so Keras is used instead
+        """
+        base_path = os.path.splitext(model_path)[0]
+        tflite_path = base_path + '.tflite'
+        tf = _tensorflow()
+        
+        try:
+            if not os.path.exists(tflite_path):
+                converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+                # Dynamic-range quantization stores the weights as int8
+                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                with open(tflite_path, 'wb') as f:
+                    f.write(converter.convert())
+                print(f"Converted model to {tflite_path}")
+            
+            candidates = [_TFLiteModel(tflite_path, n_features)]
+        except Exception as e:
+            print(f"TFLite model unavailable, using Keras: {e}")
+            return None
+        
+        # The same model on every core, and the int8 copy if there is one
+        cpu_count = os.cpu_count() or 1
+        thread_counts = (1, cpu_count) if cpu_count > 1 else (1,)
+        options = [(tflite_path, n) for n in thread_counts[1:]]
+        int8_path = base_path + '_int8.tflite'
+        if os.path.exists(int8_path):
+            options += [(int8_path, n) for n in thread_counts]
+        
+        for path, num_threads in options:
+            try:
+                candidates.append(_TFLiteModel(path, n_features, num_threads))
+            except Exception as e:
+                print(f"Skipping {path} on {num_threads} thread(s): {e}")
+        
+        return _select_runtime(candidates, n_features)
+    
+    def _flatten_features_into(self, features_dict, out, row):
+        """
+        Write the nested feature dictionary into row `row` of out as a flat
+        series of numbers (same order as in training)
+        Features the model doesn't know about are dropped, missing ones stay 0
+        """
+        n = min(len(KEY_PATHS), len(self.feature_names))
+        if n == len(KEY_PATHS):
+            flatten_features_into(features_dict, out[row, :n])
+        else:
+            flat = np.empty(len(KEY_PATHS))
+            flatten_features_into(features_dict, flat)
+            out[row, :n] = flat[:n]
+    
+    def _extract_features_into(self, signature_data, out, row):
+        """
+        Extract one signature's features straight into row `row` of out,
+        without building the nested feature dictionary
+        """
+        n = len(KEY_PATHS)
+        if len(self.feature_names) >= n:
+            out[row, :n] = self._cached_feature_row(signature_data)
+        else:
+            # The model knows fewer features than the collector writes
+            self._flatten_features_into(self.collector.process_signature(signature_data), out, row)
+    
+    def _cached_feature_row(self, signature_data):
+        """
+        One signature's features as a float64 row in KEY_PATHS order,
+        reused from the cache when the same signature was seen recently
+        """
+        try:
+            # Key by a 16-byte digest so the cache doesn't hold every signature's JSON
+            key = hashlib.blake2b(
+                orjson.dumps(signature_data, option=orjson.OPT_SERIALIZE_NUMPY), digest_size=16
+            ).digest()
+        except orjson.JSONEncodeError:
+            key = None  # not serializable as-is, so it can't be cached
+        
+        if key is not None:
+            with _FEATURE_CACHE_LOCK:
+                feature_row = _FEATURE_CACHE.get(key)
+                if feature_row is not None:
+                    _FEATURE_CACHE.move_to_end(key)
+                    return feature_row
+        
+        feature_row = np.empty((1, len(KEY_PATHS)))
+        self.collector.process_signature_into(signature_data, feature_row, 0)
+        feature_row = feature_row[0]
+        
+        if key is not None:
+            with _FEATURE_CACHE_LOCK:
+                _FEATURE_CACHE[key] = feature_row
+                if len(_FEATURE_CACHE) > FEATURE_CACHE_SIZE:
+                    _FEATURE_CACHE.popitem(last=False)
+        
+        return feature_row
+    
     def _flatten_features(self, features_dict):
         """
-        Convert the nested feature dictionary into a flat list of numbers
+        Convert the nested feature dictionary into a flat row of numbers
         This is like turning a complex description into a series of measurements
         """
-        flat_features = []
-        
-        # Basic stats
-        basic = features_dict.get('basic_stats', {})
-        flat_features.extend([
-            basic.get('stroke_count', 0),
-            basic.get('total_points', 0),
-            basic.get('total_duration_ms', 0),
-            basic.get('average_points_per_stroke', 0)
-        ])
-        
-        # Velocity features
-        velocity = features_dict.get('velocity_features', {})
-        flat_features.extend([
-            velocity.get('average_velocity', 0),
-            velocity.get('max_velocity', 0),
-            velocity.get('min_velocity', 0),
-            velocity.get('velocity_std', 0)
-        ])
-        
-        # Shape features
-        shape = features_dict.get('shape_features', {})
-        flat_features.extend([
-            shape.get('width', 0),
-            shape.get('height', 0),
-            shape.get('area', 0),
-            shape.get('aspect_ratio', 0),
-            shape.get('center_x', 0),
-            shape.get('center_y', 0)
-        ])
-        
-        # Stroke features
-        stroke = features_dict.get('stroke_features', {})
-        flat_features.extend([
-            stroke.get('average_stroke_length', 0),
-            stroke.get('total_length', 0),
-            stroke.get('length_variation', 0),
-            stroke.get('average_stroke_duration', 0),
-            stroke.get('duration_variation', 0)
-        ])
-        
-        # Replace any None values with 0
-        flat_features = [0 if x is None else x for x in flat_features]
-        
-        return flat_features
-    
-    def verify_signature(self, signature_data, claimed_user_id):
+        flat_features = np.zeros((1, len(self.feature_names)), dtype=np.float32)
+        self._flatten_features_into(features_dict, flat_features, 0)
+        return flat_features[0]
+    
+    def prepare_features(self, signature_data):
         """
-        Verify if a signature is genuine or a forgery
-        Returns: (is_genuine, confidence_score, analysis)
+        Extract and standardize the features of one signature
+        The rows returned are this thread's scratch buffers, overwritten by
+        its next call
+        Returns: (scaled float32 row, flat float32 feature row)
         """
         
-        # Process the signature to extract features
-        features = self.collector.process_signature(signature_data)
+        # Extract the features straight into a float32 row (same order as in
+        # training); missing ones stay 0. The model and scaler work in
+        # float32 too, so nothing is cast along the way
+        flat_features, x_scaled = _scratch_rows(len(self.feature_names))
+        flat_features.fill(0)
+        self._extract_features_into(signature_data, flat_features, 0)
         
-        # Flatten features (same as in training)
-        flat_features = self._flatten_features(features)
+        # Normalize using the same scaler from training
+        _standardize(flat_features[0], self.scaler_mean, self.scaler_inv_scale, x_scaled)
         
-        # Ensure we have the right number of features
-        if len(flat_features) != len(self.feature_names):
-            # Pad or truncate to match expected features
-            if len(flat_features) < len(self.feature_names):
-                flat_features.extend([0] * (len(self.feature_names) - len(flat_features)))
-            else:
-                flat_features = flat_features[:len(self.feature_names)]
+        return x_scaled, flat_features[0]
+    
+    def standardize_rows(self, X):
+        """Standardize a float32 feature matrix in place"""
+        X -= self.scaler_mean
+        X *= self.scaler_inv_scale
+        return X
+    
+    def predict_batch(self, X_scaled):
+        """
+        Run the model on up to MAX_BATCH standardized rows at once
+        Returns one genuine-probability per row
+        """
+        n = X_scaled.shape[0]
         
-        # Convert to numpy array and reshape
-        X = np.array([flat_features])
+        if self._dense is not None:
+            return self._dense.predict(np.ascontiguousarray(X_scaled, dtype=np.float32))
         
-        # Normalize using the same scaler from training
-        X_scaled = self.scaler.transform(X)
+        if self._tflite is not None:
+            batch = np.zeros((MAX_BATCH, X_scaled.shape[1]), dtype=np.float32)
+            batch[:n] = X_scaled
+            return self._tflite.predict(batch)[:n]
         
-        # Get prediction
-        prediction = self.model.predict(X_scaled, verbose=0)[0][0]
+        return self._predict(np.asarray(X_scaled, dtype=np.float32)).numpy()[:, 0]
+    
+    def verify_batch(self, signatures):
+        """
+        Score many signatures with as few model calls as possible
+        Returns one genuine-probability per signature
+        """
+        X = np.zeros((len(signatures), len(self.feature_names)), dtype=np.float32)
+        for i, signature_data in enumerate(signatures):
+            self._extract_features_into(signature_data, X, i)
+        return self.predict_rows(self.standardize_rows(X))
+    
+    def predict_rows(self, X_scaled):
+        """
+        Run the model over any number of standardized rows
+        TFLite takes a large set in one invoke, other runtimes MAX_BATCH at a time
+        """
+        if self._tflite is not None and X_scaled.shape[0] > MAX_BATCH:
+            return self._tflite.predict_many(np.ascontiguousarray(X_scaled, dtype=np.float32))
+        
+        predictions = np.empty(X_scaled.shape[0], dtype=np.float32)
+        for start in range(0, X_scaled.shape[0], MAX_BATCH):
+            predictions[start:start + MAX_BATCH] = self.predict_batch(X_scaled[start:start + MAX_BATCH])
+        return predictions
+    
+    def build_analysis(self, flat_features, prediction, include_features=False):
+        """
+        Turn a model prediction into the verdict returned to callers
+        The per-feature values are only listed when include_features is set
+        Returns: (is_genuine, confidence_score, analysis)
+        """
         
         # Convert to percentage
-        confidence = prediction * 100
+        confidence = float(prediction * 100)
         is_genuine = prediction > 0.5
         
         # Create analysis
         analysis = {
             'is_genuine': is_genuine,
-            'confidence': float(confidence),
+            'confidence': confidence,
             'threshold': 50.0,
-            'features': {
-                name: float(value) for name, value in zip(self.feature_names[:len(flat_features)], flat_features)
-            },
+            'features': dict(zip(self.feature_names, flat_features.tolist())) if include_features else None,
             'verdict': 'GENUINE' if is_genuine else 'FORGERY DETECTED'
         }
         
         return is_genuine, confidence, analysis
     
+    def verify_signature(self, signature_data, claimed_user_id, include_features=False):
+        """
+        Verify if a signature is genuine or a forgery
+        Set include_features to also get the extracted features in analysis
+        Returns: (is_genuine, confidence_score, analysis)
+        """
+        x_scaled, flat_features = self.prepare_features(signature_data)
+        
+        # Get prediction
+        prediction = self.predict_batch(x_scaled[np.newaxis])[0]
+        
+        return self.build_analysis(flat_features, prediction, include_features)
+    
     def verify_from_file(self, filepath):
         """Verify a signature from a saved JSON file"""
         
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        data = load_signature_file(filepath)
         
         user_id = data['user_id']
         signature_data = data['raw_data']
@@ -174,6 +661,19 @@ class SignatureVerifier:
         return analysis
 
 
+def _load_for_test(verifier, file, X, row):
+    """
+    Read one signature file and extract its features into X[row]
+    Returns (user_id, actual_type), or the error raised
+    """
+    try:
+        data = load_signature_file(file)
+        verifier._extract_features_into(data['raw_data'], X, row)
+        return data['user_id'], data['type']
+    except Exception as e:
+        return e
+
+
 def test_all_signatures():
     """Test the model on all saved signatures"""
     
@@ -182,37 +682,44 @@ def test_all_signatures():
     # Get all signature files
     files = glob.glob('data/signature_data_*.json')
     
-    correct = 0
-    total = 0
-    
     print("\n" + "="*50)
     print("Testing all signatures...")
     print("="*50)
     
-    for file in files:
-        try:
-            with open(file, 'r') as f:
-                data = json.load(f)
-            
-            user_id = data['user_id']
-            actual_type = data['type']
-            
-            is_genuine, confidence, _ = verifier.verify_signature(data['raw_data'], user_id)
-            predicted_type = 'genuine' if is_genuine else 'forgery'
+    # Extract every signature's features first, so the model runs once per batch
+    # Files are read and processed on a thread pool to overlap the I/O
+    # and each worker writes its own row of X
+    X = np.zeros((len(files), len(verifier.feature_names)), dtype=np.float32)
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+        results = list(ex.map(lambda i: _load_for_test(verifier, files[i], X, i), range(len(files))))
+    
+    loaded = []
+    rows = []
+    for i, (file, result) in enumerate(zip(files, results)):
+        if isinstance(result, Exception):
+            print(f"Error processing {file}: {result}")
+            continue
+        loaded.append(result)
+        rows.append(i)
+    
+    correct = 0
+    total = len(loaded)
+    
+    if loaded:
+        predictions = verifier.predict_rows(verifier.standardize_rows(X[rows]))
+        predicted_types = np.where(predictions > 0.5, 'genuine', 'forgery')
+        
+        for (user_id, actual_type), prediction, predicted_type in zip(loaded, predictions, predicted_types):
+            confidence = prediction * 100
             
             # Check if correct
             is_correct = (actual_type == predicted_type)
             if is_correct:
                 correct += 1
             
-            total += 1
-            
             # Print result
             symbol = "✓" if is_correct else "✗"
             print(f"{symbol} {user_id:20} | Actual: {actual_type:7} | Predicted: {predicted_type:7} | Confidence: {confidence:5.1f}%")
-            
-        except Exception as e:
-            print(f"Error processing {file}: {e}")
     
     accuracy = (correct / total * 100) if total > 0 else 0
     print(f"\n📊 Overall Accuracy: {accuracy:.1f}% ({correct}/{total} correct)")